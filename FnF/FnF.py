@@ -3,102 +3,152 @@
 import os
 import sys
 import stat
-import StringQuartet
+import errno
 import re
+import time
+import json
+import pickle
+import shutil
+import tempfile
+import asyncio
+import threading
+import collections
+import itertools
+import functools
+import heapq
+import fnmatch
+import operator
+import select
+import struct
+import ctypes
+import ctypes.util
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 
 ## Filenames class (and the PathStr class)
 
-from pyAbstracts import TypedList, ComparableMixin
+from pyAbstracts import TypedList
 
 #sepRE = re.compile(os.sep)
-digitRE = re.compile('\d+')
-
-class PathStr(ComparableMixin, str):
-    
-    # wrapper for StripRegex
-    # container for the different parts of a file string (path,file,ext), object used in sort
-    class StrippedStr(ComparableMixin):
-        def __init__(self, *args):
-            # convert to lowercase (don't want to sort on case)
-            self.raw = args[0].lower()
-            # create a StripRegex object that will be able to strip out any digits from a string
-            self.__StripRE = StringQuartet.StripRegex(digitRE)
-            # use StripRegex obj to give a string with the numbers removed
-            # a list of the numbers (in the order they appear) and there positions
-            self.__StripRE.Strip(self.raw)
-            
-            # expose the few attributes of the StripRegex class that we need for the __lt__ routine
-            self.Stripped = self.__StripRE.StrippedString
-            self.groups = self.__StripRE.groups
-            self.NumGroups = self.__StripRE.NumGroups
-            self.InsertLocations = self.__StripRE.InsertLocations
+digitSplitRE = re.compile(r'(\d+)')
+
+
+def _naturalkey(s):
+    """
+    natural sort key for one part of a path (see PathStr.sortkey)
+
+    returns a tuple of text and int members ('text0', 12, 'text', ...), text
+    that is followed by a number is ended with a '0' so that it compares with
+    other characters the way the digits of the number would have
+    """
+    parts = digitSplitRE.split(s.lower())
+    for i in range(1, len(parts), 2):
+        parts[i-1] += '0'
+        parts[i] = int(parts[i])
+    return tuple(parts)
+
+
+# what a directory listing found a PathStr to be (PathStr._flags)
+_LISTEDFILE = 1
+_LISTEDDIR = 2
+# PathStr._flags: its stat is an lstat (see _getStat)
+_STATISLSTAT = 4
+
+
+class PathStr(str):
+
+    # a PathStr is kept as small as possible, there can be millions of them:
+    # no instance __dict__, the raw string is the object itself and the
+    # separator is shared by the class. The slots are only set once there is
+    # something to keep in them (reading one that isn't set raises
+    # AttributeError, see the accessors below)
+    #
+    #   _stat           os.stat_result or 'no_exist' (see stat)
+    #   _flags          _LISTEDFILE/_LISTEDDIR if this path was found in a directory
+    #                   listing, exists and isdir are then known without a stat call,
+    #                   and _STATISLSTAT if _stat is an lstat
+    #   _folder         the folder it was listed in if the path is relative to that
+    #                   folder (the same str is shared by everything listed in it)
+    #   _pathAsList     see getPathAsList
+    #   _parts          (path, filename, ext), split on first use
+    #   _sortkey        cached natural sort key
+    __slots__ = ('_stat', '_flags', '_folder', '_pathAsList', '_parts', '_sortkey')
+
+    sep = os.sep
     
     # must overload __new__ for immutable type because by the time __init__ is called
     # (i.e. after __new__) it is too late to
     # change any data
+    #
+    # all the set up is done here rather than in __init__: creating a PathStr
+    # costs one python level call instead of two, nothing is worked out (or
+    # stored) until it is asked for
     def __new__(cls, *args, **kw):
         # allow creation from list of directories
         if isinstance(args[0], list):
+            pathAsList = cls._trimlist(args[0])
             if args[0][0] == '.':
                 args = (os.path.join(*args[0]),) + args[1:]
             else:
                 args = (os.path.join(os.sep,*args[0]),) + args[1:]
+            self = str.__new__(cls, *args, **kw)
+            self._pathAsList = pathAsList
+            return self
 
         # cls = FnF.PathStr (a subtype of str)
         return str.__new__(cls, *args, **kw) # this call to new returns object of type cls (FnF.PathStr)
-    
-    # self = the return value of __new__  *args is the orginal unmodified *args from before when __new__ is called
-    def __init__(self, *args):
-        self.__path = ''
-        self.__filename = ''
-        self.__ext = ''
-        self.sep = os.sep
-        #self.sepRE = sepRE
-        self.stat = None
 
+    @staticmethod
+    def _trimlist(l):
+        # then we already know what the path as list is
+        # self._pathAsList will not have empty values at the start or end of it's 
+        # array even if self.raw starts or ends with a slash.
+        pathAsList = []
+        ignore = True
+        lastNonEmptyVal = None
+        numIgnoredVals = 0
+        for i, val in enumerate(l):
+            if ignore and val == '':
+                numIgnoredVals += 1
+                continue
+            elif val != '':
+                ignore = False
+                lastNonEmptyVal = i
+            pathAsList.append(val)
+        del pathAsList[lastNonEmptyVal-numIgnoredVals+1:] # delete any empty values at the end of the list
+        return pathAsList
+
+    # the os.stat_result of the path (or 'no_exist'), None until it is stat'ed
+    @property
+    def stat(self):
+        try:
+            return self._stat
+        except AttributeError:
+            return None
 
-        self._pathAsList = None
-        if isinstance(args[0], list):
-            # then we already know what the path as list is
-            # self._pathAsList will not have empty values at the start or end of it's 
-            # array even if self.raw starts or ends with a slash.
-            pathAsList = []
-            ignore = True
-            lastNonEmptyVal = None
-            numIgnoredVals = 0
-            for i, val in enumerate(args[0]):
-                if ignore and val == '':
-                    numIgnoredVals += 1
-                    continue
-                elif val != '':
-                    ignore = False
-                    lastNonEmptyVal = i
-                pathAsList.append(val)
-            del pathAsList[lastNonEmptyVal-numIgnoredVals+1:] # delete any empty values at the end of the list
+    @stat.setter
+    def stat(self, value):
+        self._stat = value
 
-            self._pathAsList = pathAsList
+    @property
+    def raw(self):
+        # the path as a plain str
+        return str.__str__(self)
 
-        # prepare data for use by __lt__
-        # _lt_ may get called many times in a sort, __preplt__ will only get called
-        # once per object
-        self._lessThanPrepped = False
-        # separate filename and extension
+    def _split(self):
+        # separate path (with its trailing separator), filename and extension,
         # the return values will also be of type str (not PathStr)
-        self.__path, File = os.path.split(self)
-        self.__filename, self.__ext = os.path.splitext(File)
-        self.raw = self.__str__()
-    
-    def __preplt__(self):
-
-        self.__StrippedParts = []
-        self.__StrippedParts.append(PathStr.StrippedStr(self.__path))
-        self.__StrippedParts.append(PathStr.StrippedStr(self.__filename))
-        self.__StrippedParts.append(PathStr.StrippedStr(self.__ext))
-        self._lessThanPrepped = True
+        # done once, the first time any of them is asked for
+        try:
+            return self._parts
+        except AttributeError:
+            path, File = os.path.split(self)
+            parts = self._parts = (path + self.sep,) + os.path.splitext(File)
+            return parts
 
     def getPathAsList(self):
-        if self._pathAsList is not None:
+        if getattr(self, '_pathAsList', None) is not None:
             # return cached value
             return self._pathAsList[:]
 
@@ -166,27 +216,81 @@ class PathStr(ComparableMixin, str):
 
         return PathStr(relativePathList)
 
-    def _getStat(self):
-        if not self.stat:
+    # the path to stat: a relative path from a listing is relative to the
+    # folder it was listed in, not to the current folder. A trailing separator
+    # is dropped for lstat, with it a link to a folder would be followed
+    def _statpath(self, lstat=False):
+        path = self.raw
+        folder = getattr(self, '_folder', None)
+        if folder is not None:
+            path = os.path.join(folder, path)
+        if lstat and len(path) > 1 and path.endswith(self.sep):
+            path = path[:-1]
+        return path
+
+    # lstat=None: the same kind of stat as the one it already has, so that
+    # exists/isdir after prefetchstat(lstat=True) still don't follow links
+    def _getStat(self, lstat=None):
+        flags = getattr(self, '_flags', 0)
+        if lstat is None:
+            lstat = bool(flags & _STATISLSTAT)
+        if statcache.maxsize:
+            # the shared cache decides when a stat is too old
+            self.stat = statcache.get(self._statpath(lstat), lstat)
+        elif not self.stat:
             try:
-                self.stat = os.stat(self.raw)
+                if lstat:
+                    self.stat = os.lstat(self._statpath(lstat))
+                else:
+                    self.stat = os.stat(self._statpath())
             except FileNotFoundError:
                 self.stat = 'no_exist'
+        else:
+            return
+        if lstat:
+            self._flags = flags | _STATISLSTAT
+        elif flags & _STATISLSTAT:
+            self._flags = flags & ~_STATISLSTAT
+
+    # pickle (and copy) the str and what has been worked out about it (with
+    # any protocol, 0 and 1 can't pickle __slots__ by themselves)
+    def __reduce__(self):
+        state = {}
+        for name in self.__slots__:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        return (self.__class__, (self.raw,), (None, state))
+
+    @staticmethod
+    def _listed(path, isdir, folder=None):
+        # create a PathStr for something found in a directory listing, $folder
+        # is the folder that was listed if $path is relative to it
+        ps = _pathstr(path)
+        ps._flags = _LISTEDDIR if isdir else _LISTEDFILE
+        if folder is not None:
+            ps._folder = folder
+        return ps
         
     @property
-    def path(self):                            # allow getting of private attribute
-        return self.__path + self.sep
+    def path(self):
+        return self._split()[0]
         
     @property
-    def filename(self):                        # allow getting of private attribute
-        return self.__filename
+    def filename(self):
+        return self._split()[1]
         
     @property
-    def ext(self):                             # allow getting of private attribute
-        return self.__ext
+    def ext(self):
+        return self._split()[2]
 
     @property
     def exists(self):
+        if not self.stat and getattr(self, '_flags', 0) & (_LISTEDFILE | _LISTEDDIR) and not statcache.maxsize:
+            # was found in a directory listing (with the shared statcache on
+            # that is out of date once the cache's ttl or invalidate says so)
+            return True
         self._getStat()
         if self.stat == 'no_exist':
             return False
@@ -195,6 +299,8 @@ class PathStr(ComparableMixin, str):
 
     @property
     def isdir(self):
+        if not self.stat and getattr(self, '_flags', 0) & (_LISTEDFILE | _LISTEDDIR) and not statcache.maxsize:
+            return bool(self._flags & _LISTEDDIR)
         self._getStat()
         if self.stat == 'no_exist':
             return False
@@ -207,12 +313,13 @@ class PathStr(ComparableMixin, str):
         return self.path == self.raw
 
 
-    def __hash__(self):
-        return hash(str(self))
+    # the hash of a str is worked out once and cached by python, a PathStr
+    # hashes (and so can be looked up in a dict or set) the same as its raw str
+    __hash__ = str.__hash__
 
     def __eq__(self, other):
         if isinstance(other, str):
-            return hash(self) == hash(other)
+            return str.__eq__(self, other)
         else:
             raise NotImplementedError('PathStr object can only compare equality with other string like objects')
     
@@ -220,62 +327,45 @@ class PathStr(ComparableMixin, str):
         return not (self == other)
 
     # make iterable containers (Lists,Tuples,Filename Class) of PathStr sortable:
-    # define the less than function 
-    # (other rich comparisons will be defined using the ComparableMixin class)    
+    # all the ordering comparisons use the natural sort key (see sortkey)
     def __lt__(self, other):
+        if not isinstance(other, PathStr):
+            other = PathStr(other)
+        return self.sortkey < other.sortkey
 
-        if not self._lessThanPrepped:
-            self.__preplt__()
+    def __le__(self, other):
+        if not isinstance(other, PathStr):
+            other = PathStr(other)
+        return self.sortkey <= other.sortkey
 
-        if not other._lessThanPrepped:
-            other.__preplt__()
+    def __gt__(self, other):
+        if not isinstance(other, PathStr):
+            other = PathStr(other)
+        return self.sortkey > other.sortkey
 
-        # self and other are a list of length 3 of type StrippedStr
-        # the path, the filename and the extension
-        self_ = self.__StrippedParts
-        other_ = other.__StrippedParts
+    def __ge__(self, other):
+        if not isinstance(other, PathStr):
+            other = PathStr(other)
+        return self.sortkey >= other.sortkey
 
-        for i in range(3):
-            S = self_[i]
-            O = other_[i]
-            if S.raw == O.raw:
-                # if this part of the full filename is the same they should be sorted
-                # on a more specific part of their filename
-                continue
-            elif S.Stripped == O.Stripped:
-                # this part of the filename is only the same when the numbers have been stripped out
-                for i, NumStr in enumerate(S.groups):
-                    if i < O.NumGroups:
-                        if S.InsertLocations[i] == O.InsertLocations[i]:
-                            # self and other have numerics appearing in the same place
-                            sNum = float(NumStr)
-                            oNum = float(O.groups[i])
-                            if sNum == oNum:
-                                # have found the same number appearing at the same point
-                                # can't make any conclusions on this
-                                continue
-                            else:
-                                # have found two different numbers that occur at the same point
-                                return sNum < oNum
-                        else:
-                            # self and other have numerics appearing in different places
-                            # the string where the number appears first is the lesser string
-                            return S.InsertLocations[i] < O.InsertLocations[i]
-                    else:
-                        # other is a longer string, and all numbers have been equal
-                        return True
-            # BUG------------------------------BUG---------------------BUG--------------------BUG-------------------BUG------------------------------
-            #### just because this part of the filename isn't the same can't compare them as we don't know where the numbers have been stripped from
-            #### use 'wallpaper-266390[1]' and 'wallpaper-2656946' as examples
-            else: 
-                # this part of the filename is not the same
-                # can sort using the raw strings:
-                return S.raw < O.raw
-        
-        # the stripped strings were the same and the numbers contains in the unstripped string 
-        # mathematically evaluate to be equivalent (they must contain padding zeros)
-        # can only now compare the strings in the normal way
-        return self.raw < other.raw
+    @property
+    def sortkey(self):
+        """
+        key for sorting PathStr's in natural order: sorted(paths, key=lambda p: p.sortkey)
+
+        the path, filename and extension are compared in turn, case insensitively
+        and with the numbers in them compared by value (exactly, as ints). The raw
+        string is only used if all three are equal.
+        """
+        try:
+            return self._sortkey
+        except AttributeError:
+            path, filename, ext = self._split()
+            key = self._sortkey = (_naturalkey(path[:-1]),
+                                   _naturalkey(filename),
+                                   _naturalkey(ext),
+                                   self.raw)
+            return key
 
     @staticmethod
     def join(*args):
@@ -298,12 +388,176 @@ class PathStr(ComparableMixin, str):
 #------------------------------------
 
 
+_getsortkey = operator.attrgetter('sortkey')
+
+# PathStr(path) for a str path without the python level PathStr.__new__
+# (that is only needed for the list form), for making PathStr's in bulk
+_pathstr = functools.partial(str.__new__, PathStr)
+
+
+## parallel sort
+#
+# Filenames.sort(workers=N) works out the sort keys and sorts chunks of the
+# list on a process pool. The keys are sent back as bytes that compare in the
+# same order as PathStr.sortkey (so the parent never builds the tuples) and
+# the sorted chunks are merged by a final list.sort, which finds the sorted
+# runs and only has to merge them
+
+# lists shorter than this are not worth sending to other processes
+_PARALLEL_SORT_MIN = 50000
+
+
+# append the bytes of a _naturalkey tuple to $out: text as utf-8 ended by a zero
+# byte, numbers as their number of digits (one byte, or 255 and 8 bytes for
+# very long ones) then the digits, and a zero byte for the end of the tuple.
+# Nothing in a path is a zero byte and a number's length never is, so the
+# bytes compare the same way as the tuples do
+def _encodenaturalkey(key, out):
+    for i, v in enumerate(key):
+        if i % 2:
+            digits = str(v).encode('ascii')
+            n = len(digits)
+            out.append(bytes((n,)) if n < 255 else b'\xff' + n.to_bytes(8, 'big'))
+            out.append(digits)
+        else:
+            out.append(v.encode('utf-8', 'surrogatepass'))
+            out.append(b'\x00')
+    out.append(b'\x00')
+
+
+def _naturalbyteskey(path):
+    """ PathStr(path).sortkey as bytes (that sort in the same order) """
+    out = []
+    for key in _naturalpathkey(path)[:3]:
+        _encodenaturalkey(key, out)
+    out.append(path.encode('utf-8', 'surrogatepass'))
+    return b''.join(out)
+
+
+# runs in a worker process: $paths is a chunk of paths joined by zero
+# characters (one string pickles much smaller and faster than a list)
+def _sortchunk(paths):
+    keys = [_naturalbyteskey(p) for p in paths.split('\x00')]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return [keys[i] for i in order], array('I', order)
+
+
+def _parallelorder(paths, workers, reverse=False):
+    """
+    the order (list of indices) that sorts the str's in $paths in natural order,
+    the same order as Filenames.sort, worked out on $workers processes
+    """
+    size = -(-len(paths) // workers)
+    starts = range(0, len(paths), size)
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_sortchunk, ['\x00'.join(paths[i:i + size]) for i in starts])
+        keys = []
+        index = []
+        for start, (chunkkeys, order) in zip(starts, results):
+            keys.extend(chunkkeys)
+            index.extend([start + i for i in order])
+    return [index[i] for i in sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)]
+
+
+# the (folder, lower case extention) group a path belongs to in Filenames.select,
+# the folder is everything up to and including the last separator
+def _groupkey(v):
+    i = v.rfind(os.sep) + 1
+    return v[:i], _extof(v, i)
+
+
+# lower case extention of the filename that starts at $start in $v (the same
+# as os.path.splitext(v)[1].lower(), without the python level work)
+def _extof(v, start=0):
+    j = v.rfind('.', start)
+    # dots at the start of the name are not an extention
+    if j > start and v[start:j].lstrip('.'):
+        return v[j:].lower()
+    return ''
+
+
+# the select groups (see Filenames._getgroups) are two dicts: folder -> {ext ->
+# {path: number of times it is in the list}} and ext -> {folder: None}, the
+# folders that have paths with that extention
+def _groupadd(groups, values):
+    folders, exts = groups
+    for v in values:
+        folder, ext = _groupkey(v)
+        byext = folders.get(folder)
+        if byext is None:
+            byext = folders[folder] = {}
+        bucket = byext.get(ext)
+        if bucket is None:
+            bucket = byext[ext] = {}
+            exts.setdefault(ext, {})[folder] = None
+        bucket[v] = bucket.get(v, 0) + 1
+
+
+def _groupremove(groups, values):
+    folders, exts = groups
+    for v in values:
+        folder, ext = _groupkey(v)
+        byext = folders[folder]
+        _uncount(byext[ext], v)
+        if not byext[ext]:
+            del byext[ext]
+            del exts[ext][folder]
+            if not exts[ext]:
+                del exts[ext]
+            if not byext:
+                del folders[folder]
+
+
+# stat a list of PathStr's (run on a thread by _prefetchstat)
+def _statchunk(paths, lstat):
+    for p in paths:
+        try:
+            p._getStat(lstat)
+        except OSError:
+            pass
+
+
+# stat the PathStr's in $paths, $workers at a time on a thread pool
+def _prefetchstat(paths, workers, lstat):
+    if not paths:
+        return
+    # hand the paths out in chunks, one task per path costs more than the stat
+    size = max(1, min(1000, len(paths) // (workers * 4)))
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in pool.map(_statchunk, chunks, [lstat] * len(chunks)):
+            pass
+
+
+# take one off the count of $v in the dict $counts
+def _uncount(counts, v):
+    n = counts[v] - 1
+    if n:
+        counts[v] = n
+    else:
+        del counts[v]
+
+
 class Filenames(TypedList):
+
+    # path -> number of times it is in the list, only kept if indexed=True
+    _index = None
+    # (folder -> {ext -> {path: number of times it is in the list}}, ext -> {folder: None}),
+    # made by select
+    _groups = None
     
-    def __init__(self, *args):
+    def __init__(self, *args, **kwargs):
+        """
+        *args:      [paths]                     str's or PathStr's to fill the list with
+
+        **kwargs:   indexed = True/[False]      keep a hash index of the paths: makes
+                                                'in' and the set operations O(1) per path
+        """
         self._oktypes = PathStr             # the only allowed type in this container is the PathStr type
         self._list = list()
         self.RecursionGuard = False
+        if 'indexed' in kwargs and kwargs.pop('indexed'):
+            self._index = {}
         if len(args) > 0:
             self.extend(args[0])
     
@@ -311,26 +565,228 @@ class Filenames(TypedList):
     def __getitem__(self, i): 
         val = self._list[i]
         if type(i) is slice:
-            val = Filenames(val)
+            val = Filenames(val, indexed=self._index is not None)
         return val
+
+    ## keeping the indexes up to date
+    #
+    # _index (see indexed=True) and _groups (see select) are changed in place
+    # by every insert, __setitem__ and __delitem__ (so by append, extend,
+    # remove, pop, del ...)
+
+    def _added(self, values):
+        index = self._index
+        if index is not None:
+            for v in values:
+                index[v] = index.get(v, 0) + 1
+        if self._groups is not None:
+            _groupadd(self._groups, values)
+
+    def _removed(self, values):
+        index = self._index
+        if index is not None:
+            for v in values:
+                _uncount(index, v)
+        if self._groups is not None:
+            _groupremove(self._groups, values)
+
+    def __setitem__(self, i, v):
+        if self._index is None and self._groups is None:
+            return TypedList.__setitem__(self, i, v)
+        old = self._list[i]
+        v = self.check(v)
+        self._list[i] = v
+        if type(i) is slice:
+            self._removed(old)
+            self._added(v)
+        else:
+            self._removed([old])
+            self._added([v])
+
+    def __delitem__(self, i):
+        if self._index is not None or self._groups is not None:
+            old = self._list[i]
+            self._removed(old if type(i) is slice else [old])
+        del self._list[i]
+
+    def insert(self, i, v):
+        v = self.check(v)
+        self._list.insert(i, v)
+        if self._index is not None or self._groups is not None:
+            self._added([v])
+
+    # the same as appending them one at a time (which is what the
+    # MutableSequence.extend that TypedList uses does), in one go
+    def extend(self, values):
+        values = [v if type(v) is PathStr else _pathstr(v) if type(v) is str else self.check(v)
+                  for v in values]
+        self._list.extend(values)
+        if self._index is not None or self._groups is not None:
+            self._added(values)
+
+    ## lookups by extension and folder
+    #
+    # the paths are grouped by folder and then by lower case extension, with
+    # a second dict from each extension to the folders that have it. The
+    # groups are only made the first time they are needed and then kept up to
+    # date, so a lookup by folder or by extension goes straight to the groups
+    # it returns (only rec=True looks through all the folders)
+
+    def _getgroups(self):
+        if self._groups is None:
+            groups = ({}, {})
+            _groupadd(groups, self)
+            self._groups = groups
+        return self._groups
+
+    def select(self, **kwargs):
+        """
+        **kwargs:   ext = []                    list of file extentions to include (i.e. ['.jpg','.bmp']),
+                                                not case sensitive (the same as listfilesext)
+                    folder = None               only paths in this folder
+                    rec = True/[False]          with $folder, also paths in all its sub folders
+
+        Returns a Filenames of the matching paths (grouped by folder and extention)
+        """
+        exts = None
+        if 'ext' in kwargs:
+            ext = kwargs.pop('ext')
+            if isinstance(ext, str):
+                ext = [ext]
+            exts = set(e.lower() for e in ext)
+
+        folder = None
+        if 'folder' in kwargs:
+            folder = kwargs.pop('folder')
+            if folder:
+                folder = os.path.join(folder, '')
+
+        rec = False
+        if 'rec' in kwargs:
+            rec = kwargs.pop('rec')
+
+        folders, extfolders = self._getgroups()
+        if folder is None:
+            infolders = None
+        elif rec:
+            infolders = [f for f in folders if f.startswith(folder)]
+        else:
+            infolders = [folder]
+
+        # the (folder, ext) groups to return
+        keys = []
+        if exts is None:
+            for f in (folders if infolders is None else infolders):
+                keys.extend((f, e) for e in folders.get(f, ()))
+        elif infolders is None:
+            for e in exts:
+                keys.extend((f, e) for f in extfolders.get(e, ()))
+        else:
+            for f in infolders:
+                byext = folders.get(f, ())
+                keys.extend((f, e) for e in exts if e in byext)
+
+        result = Filenames()
+        for f, e in keys:
+            for v, n in folders[f][e].items():
+                result._list.extend([v] * n)
+        return result
+
+    def byext(self, ext):
+        return self.select(ext=ext)
+
+    def byfolder(self, folder, rec=False):
+        return self.select(folder=folder, rec=rec)
+
+    ## membership and set operations
+    #
+    # these treat the lists as sets of paths: the results hold each path once,
+    # in the order it was first seen, and are themselves indexed
+
+    def __contains__(self, v):
+        if self._index is not None:
+            return isinstance(v, str) and v in self._index
+        return TypedList.__contains__(self, v)
+
+    # the paths in $other as something with O(1) membership
+    @staticmethod
+    def _members(other):
+        if isinstance(other, Filenames) and other._index is not None:
+            return other._index
+        return set(other)
+
+    def _fromunique(self, values):
+        result = Filenames(indexed=True)
+        result._list = [v if isinstance(v, PathStr) else result.check(v) for v in values]
+        result._index = dict.fromkeys(result._list, 1)
+        return result
+
+    def union(self, other):
+        return self._fromunique(dict.fromkeys(itertools.chain(self, other)))
+
+    def intersection(self, other):
+        members = self._members(other)
+        return self._fromunique(dict.fromkeys(v for v in self if v in members))
+
+    def difference(self, other):
+        members = self._members(other)
+        return self._fromunique(dict.fromkeys(v for v in self if v not in members))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
     
     # called by print        
     def __str__(self):
-        s = ''
-        # each entry is followed by a comma and a new line
-        for v in self._list:
-            s = s + v + ',\n'
-        # remove the final new line character
-        s = s[:-2]
-        return s
+        # the entries separated by a comma and a new line (joined in one go,
+        # adding to a str in a loop copies it every time)
+        return ',\n'.join(self._list)
     
     # called by just typing the object name into the terminal    
     def __repr__(self):
-        r = 'Filenames([\n'
-        r = r + self.__str__()
-        r = r + '\n])'
-        return r
+        return 'Filenames([\n' + self.__str__() + '\n])'
+
+    def export(self, f, delimiter='\n', chunksize=10000):
+        """
+        writes the paths to f without building the whole text in memory
+
+        f:          text file object or filename
+        delimiter:  ['\\n']/'\\0'/'jsonl'  written after each path, 'jsonl' writes
+                                           each path as a JSON string on its own line
+        chunksize:  [10000]                paths written to f at a time
+
+        Returns the number of paths written
+        """
+        return _exportpaths(f, self, delimiter, chunksize)
     
+    # sort using the precomputed PathStr.sortkey rather than pairwise __lt__ calls
+    # (with workers: on a process pool, see _parallelorder)
+    def sort(self, reverse=False, workers=None):
+        if workers is None or workers < 2 or len(self._list) < _PARALLEL_SORT_MIN:
+            self._list.sort(key=_getsortkey, reverse=reverse)
+        else:
+            items = self._list
+            self._list = [items[i] for i in _parallelorder(self.getstrlist(), workers, reverse)]
+
+    def prefetchstat(self, workers=8, lstat=False):
+        """
+        stat every path that has not been stat'ed yet, $workers at a time on a
+        thread pool, and keep the results on the PathStr's (as exists, isdir
+        and _getStat do, files that do not exist get 'no_exist') and in the
+        shared statcache if it is on
+
+        with lstat=True symbolic links are not followed: a link gets the stat of
+        the link itself
+
+        any other OSError (permission denied ...) leaves that stat unset, it will
+        be raised if the stat is asked for later
+        """
+        _prefetchstat([p for p in self._list if not p.stat], workers, lstat)
+
+    def toarray(self):
+        """ FilenamesArray (a numpy view) of this list, needs numpy """
+        return FilenamesArray(self)
+
     # function to convert a Filename object back into a list of strings
     def getstrlist(self):
         l = []
@@ -341,9 +797,13 @@ class Filenames(TypedList):
     # override the check method to allow variables of type str to be converted into type PathStr
     # allow assignment of lists (as long as they just contain str or PathStr)
     def check(self, v):
+        # PathStr's are allowed as they are (don't lose any cached stat info)
+        if isinstance(v, self._oktypes):
+            pass
+
         # allow strings: but convert to PathStr
-        if isinstance(v, str):
-            v = PathStr(v)
+        elif isinstance(v, str):
+            v = _pathstr(v)
         
         #     
         elif isinstance(v, list) and not self.RecursionGuard:
@@ -359,6 +819,427 @@ class Filenames(TypedList):
         return v
 
 
+
+class ColumnarFilenames(Filenames):
+    """
+    Filenames that stores each folder only once
+
+    the paths are kept in columns: a table of folders (with their trailing
+    separator) and, for each entry, the index of its folder in that table and
+    its basename. The basenames are packed one after the other into a single
+    str, with an array of where each one starts, so there is no str object per
+    entry. A PathStr is only created when an entry is asked for (by indexing or
+    iterating) so any stat info cached on the PathStr's that were added is not
+    kept.
+
+    appending (extend, and so a listing) only adds to the end of the columns,
+    any other change (setting, inserting, deleting, sorting) packs the
+    basenames again, which costs about one pass over all the entries. Being one
+    str, a single basename outside latin-1 makes every character of the packed
+    basenames take 2 (or 4) bytes.
+
+    folder + basename always gives back exactly the string that was added
+    """
+
+    def __init__(self, *args):
+        self._oktypes = PathStr
+        self.RecursionGuard = False
+        self._dirs = []                 # folder table
+        self._dirids = {}               # folder -> index in the folder table
+        self._ids = array('I')          # folder index of each entry
+        self._names = ''                # basenames of all the entries, packed
+        self._offsets = array('Q', [0]) # where each basename starts (and the last one ends)
+        if len(args) > 0:
+            self.extend(args[0])
+
+    # split a path after its last separator, returns (folder index, basename)
+    def _splitpath(self, v):
+        if not isinstance(v, str):
+            raise TypeError(['can only contain variables of type: ', self._oktypes])
+        i = v.rfind(PathStr.sep) + 1
+        folder = v[:i]
+        dirid = self._dirids.get(folder)
+        if dirid is None:
+            dirid = self._dirids[folder] = len(self._dirs)
+            self._dirs.append(folder)
+        return dirid, v[i:]
+
+    # the basenames unpacked into a list (for the changes that pack them again)
+    def _namelist(self):
+        names = self._names
+        offsets = self._offsets
+        return [names[a:b] for a, b in zip(offsets, itertools.islice(offsets, 1, None))]
+
+    def _setnames(self, names):
+        self._names = ''.join(names)
+        self._offsets = array('Q', [0])
+        self._offsets.extend(itertools.accumulate(map(len, names)))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            val = ColumnarFilenames()
+            val._dirs = self._dirs[:]
+            val._dirids = self._dirids.copy()
+            val._ids = self._ids[i]
+            val._setnames(self._namelist()[i])
+            return val
+        dirid = self._ids[i]
+        if i < 0:
+            i += len(self._ids)
+        return _pathstr(self._dirs[dirid] + self._names[self._offsets[i]:self._offsets[i + 1]])
+
+    # the groups made by select are not kept up to date here, they are
+    # dropped on any change and made again when next needed
+    def __setitem__(self, i, v):
+        self._groups = None
+        names = self._namelist()
+        if type(i) is slice:
+            columns = [self._splitpath(x) for x in v]
+            self._ids[i] = array('I', [c[0] for c in columns])
+            names[i] = [c[1] for c in columns]
+        else:
+            self._ids[i], names[i] = self._splitpath(v)
+        self._setnames(names)
+
+    def __delitem__(self, i):
+        self._groups = None
+        names = self._namelist()
+        del self._ids[i]
+        del names[i]
+        self._setnames(names)
+
+    def insert(self, i, v):
+        self._groups = None
+        dirid, name = self._splitpath(v)
+        names = self._namelist()
+        self._ids.insert(i, dirid)
+        names.insert(i, name)
+        self._setnames(names)
+
+    # append without going through insert, this is how a listing is filled.
+    # The basenames are packed 10000 at a time, so a str per entry is never
+    # kept for the whole listing
+    def extend(self, values):
+        self._groups = None
+        if values is self:
+            values = self.getstrlist()
+        values = iter(values)
+        offsets = self._offsets
+        packed = [self._names]
+        try:
+            while True:
+                columns = [self._splitpath(v) for v in itertools.islice(values, 10000)]
+                if not columns:
+                    break
+                names = [c[1] for c in columns]
+                end = offsets[-1]
+                self._ids.extend(array('I', [c[0] for c in columns]))
+                offsets.extend([end + n for n in itertools.accumulate(map(len, names))])
+                packed.append(''.join(names))
+        finally:
+            self._names = ''.join(packed)
+
+    def __iter__(self):
+        dirs = self._dirs
+        names = self._names
+        offsets = self._offsets
+        for dirid, a, b in zip(self._ids, offsets, itertools.islice(offsets, 1, None)):
+            yield _pathstr(dirs[dirid] + names[a:b])
+
+    def __contains__(self, v):
+        if not isinstance(v, str):
+            return False
+        i = v.rfind(PathStr.sep) + 1
+        dirid = self._dirids.get(v[:i])
+        if dirid is None:
+            return False
+        name = v[i:]
+        size = len(name)
+        names = self._names
+        offsets = self._offsets
+        for d, a, b in zip(self._ids, offsets, itertools.islice(offsets, 1, None)):
+            if d == dirid and b - a == size and names.startswith(name, a):
+                return True
+        return False
+
+    def __str__(self):
+        return ',\n'.join(self.getstrlist())
+
+    # same order as Filenames.sort, the folder part of the sort key is
+    # worked out once per folder rather than once per entry
+    def sort(self, reverse=False, workers=None):
+        if workers is not None and workers > 1 and len(self._ids) >= _PARALLEL_SORT_MIN:
+            self._reorder(_parallelorder(self.getstrlist(), workers, reverse))
+            return
+
+        dirkeys = [_naturalkey(os.path.split(d)[0]) for d in self._dirs]
+        dirs = self._dirs
+        ids = self._ids
+        names = self._namelist()
+
+        def key(j):
+            filename, ext = os.path.splitext(names[j])
+            return (dirkeys[ids[j]], _naturalkey(filename), _naturalkey(ext), dirs[ids[j]] + names[j])
+
+        self._reorder(sorted(range(len(names)), key=key, reverse=reverse))
+
+    # put the entries in the order given by a list of their indices
+    def _reorder(self, order):
+        ids = self._ids
+        names = self._namelist()
+        self._ids = array('I', [ids[j] for j in order])
+        self._setnames([names[j] for j in order])
+
+    def getstrlist(self):
+        dirs = self._dirs
+        names = self._names
+        offsets = self._offsets
+        return [dirs[dirid] + names[a:b] for dirid, a, b in zip(self._ids, offsets, itertools.islice(offsets, 1, None))]
+
+    def prefetchstat(self, workers=8, lstat=False):
+        """
+        stat every path that is not in the shared statcache (or is out of date
+        there), $workers at a time (see Filenames.prefetchstat)
+
+        a ColumnarFilenames doesn't keep PathStr's, so the statcache is the only
+        place the results can be kept: it has to be on (statcache.maxsize),
+        and big enough for all the paths to be of much use
+        """
+        if not statcache.maxsize:
+            raise RuntimeError('ColumnarFilenames.prefetchstat keeps the stats in the shared statcache, '
+                               'which is off (see statcache.maxsize)')
+        _prefetchstat(list(self), workers, lstat)
+
+## numpy view of a Filenames (numpy is optional, only needed for this)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('FilenamesArray needs numpy (pip install numpy)')
+    return numpy
+
+
+class FilenamesArray(object):
+    """
+    numpy view of a Filenames (see Filenames.toarray) for working on millions
+    of paths at once
+
+    paths is a numpy unicode array of the full paths, basenames, folders, exts
+    (lower case, the same as listfilesext) and depths (the number of
+    separators) are worked out from it the first time they are used, with
+    numpy's string functions and on the character codes behind the unicode
+    array rather than in a python loop.
+
+    the masks (startswith, endswith, contains, hasext) can be combined with
+    numpy's & | ~ and given to filter, which returns a Filenames of the
+    original PathStr's:
+
+        arr = files.toarray()
+        jpgs = arr.filter(arr.hasext(['.jpg']) & (arr.depths > 3))
+        counts = arr.extcounts()
+
+    making the array (and its columns) costs about as much as one python loop
+    over the paths, it pays off when several queries are made on the same array.
+    Once it is made the histograms (extcounts, depthcounts, counts) are about
+    10x faster than a python loop, the string masks (startswith, endswith,
+    contains) only about 2-3x: they are numpy's string functions, which still
+    go through every character of every path
+    """
+
+    def __init__(self, files):
+        np = _numpy()
+        self._np = np
+        self._items = files._list if type(files) is Filenames else list(files)
+        # (numpy takes the PathStr's as the str's they are, no need to copy them first)
+        self.paths = np.array(self._items, dtype=str)
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    ## the columns
+
+    # the characters codes of a unicode array, one row per string padded with zeros
+    def _codes(self, strings):
+        width = max(1, strings.dtype.itemsize // 4)
+        return strings.view(self._np.uint32).reshape(len(strings), width)
+
+    def _lengths(self):
+        if 'lengths' not in self._cache:
+            self._cache['lengths'] = self._np.char.str_len(self.paths)
+        return self._cache['lengths']
+
+    def _namestart(self):
+        if 'namestart' not in self._cache:
+            self._cache['namestart'] = self._np.char.rfind(self.paths, os.sep) + 1
+        return self._cache['namestart']
+
+    # the characters from $start to $stop of each path, returns the unicode
+    # array and its character codes
+    def _slice(self, start, stop):
+        np = self._np
+        n = len(self)
+        width = max(1, int((stop - start).max())) if n else 1
+        codes = self._codes(self.paths)
+        rowwidth = codes.shape[1]
+        # the index of each character in the flattened codes
+        cols = start.astype(np.intp)[:, None] + np.arange(width, dtype=np.intp)
+        valid = cols < stop[:, None]
+        np.minimum(cols, rowwidth - 1, out=cols)
+        cols += (np.arange(n, dtype=np.intp) * rowwidth)[:, None]
+        sliced = codes.reshape(-1)[cols]
+        sliced *= valid
+        return sliced.view('<U%d' % width).reshape(n), sliced
+
+    @property
+    def basenames(self):
+        if 'basenames' not in self._cache:
+            self._cache['basenames'] = self._slice(self._namestart(), self._lengths())[0]
+        return self._cache['basenames']
+
+    @property
+    def folders(self):
+        if 'folders' not in self._cache:
+            start = self._namestart()
+            self._cache['folders'] = self._slice(self._np.zeros_like(start), start)[0]
+        return self._cache['folders']
+
+    @property
+    def exts(self):
+        if 'exts' not in self._cache:
+            np = self._np
+            start = self._namestart()
+            lengths = self._lengths()
+            dot = np.char.rfind(self.paths, '.', start)
+            isext = dot > start
+            # as os.path.splitext: dots at the start of a name are not an
+            # extention, only names that start with a dot need checking
+            # (a name that ends the longest path starts past the last column,
+            # the index is clamped: those rows have no extention anyway)
+            codes = self._codes(self.paths)
+            first = codes[np.arange(len(self)), np.minimum(start, codes.shape[1] - 1)]
+            hidden = np.flatnonzero(isext & (first == ord('.')))
+            for i in hidden.tolist():
+                isext[i] = bool(self._items[i][start[i]:dot[i]].lstrip('.'))
+            exts, codes = self._slice(np.where(isext, dot, lengths), lengths)
+            # lower case: ascii in place, anything else (rare) in python
+            codes += ((codes >= ord('A')) & (codes <= ord('Z'))).astype(np.uint32) * 32
+            for i in np.flatnonzero((codes > 127).any(1)).tolist():
+                exts[i] = exts[i].lower()
+            self._cache['exts'] = exts
+        return self._cache['exts']
+
+    @property
+    def depths(self):
+        if 'depths' not in self._cache:
+            self._cache['depths'] = self._np.char.count(self.paths, os.sep)
+        return self._cache['depths']
+
+    ## masks
+
+    def _any(self, func, strings):
+        # $func for one string, or or'ed together for a tuple of them
+        np = self._np
+        if not isinstance(strings, tuple):
+            return func(strings)
+        mask = np.zeros(len(self), bool)
+        for s in strings:
+            mask |= func(s)
+        return mask
+
+    def startswith(self, prefix):
+        """ mask of the paths that start with $prefix (or any of a tuple of them) """
+        return self._any(lambda s: self._np.char.startswith(self.paths, s), prefix)
+
+    def endswith(self, suffix):
+        """ mask of the paths that end with $suffix (or any of a tuple of them) """
+        return self._any(lambda s: self._np.char.endswith(self.paths, s), suffix)
+
+    def contains(self, s):
+        """ mask of the paths that have $s in them (or any of a tuple of them) """
+        return self._any(lambda s: self._np.char.find(self.paths, s) >= 0, s)
+
+    def hasext(self, ext):
+        """ mask of the paths with one of the extentions in $ext (not case sensitive) """
+        if isinstance(ext, str):
+            ext = [ext]
+        return self._any(lambda e: self.exts == e, tuple(e.lower() for e in ext))
+
+    ## results
+
+    def filter(self, mask):
+        """ Filenames of the paths where $mask (a boolean array, or indices) is True """
+        np = self._np
+        mask = np.asarray(mask)
+        index = np.flatnonzero(mask) if mask.dtype == bool else mask
+        items = self._items
+        result = Filenames()
+        result._list = list(map(items.__getitem__, index.tolist()))
+        return result
+
+    def _column(self, key):
+        if isinstance(key, str):
+            key = getattr(self, {'ext': 'exts', 'depth': 'depths', 'folder': 'folders',
+                                 'basename': 'basenames'}[key])
+        return self._np.asarray(key)
+
+    def _factorize(self, values):
+        """
+        returns the distinct values (sorted), the index into them of each value
+        and how many there are of each
+        """
+        np = self._np
+        if values.dtype.kind == 'U' and len(values):
+            # sort a 64 bit hash of the strings rather than the strings
+            # themselves, which is a lot faster
+            key = np.zeros(len(values), np.uint64)
+            for col in self._codes(values).T:
+                key = key * np.uint64(1000003) + col
+            _, first, inverse, counts = np.unique(key, return_index=True, return_inverse=True,
+                                                  return_counts=True)
+            uniques = values[first]
+            # hashes can collide (very rarely): check, and if they did compare the strings
+            if (uniques[inverse] == values).all():
+                order = np.argsort(uniques)
+                rank = np.empty_like(order)
+                rank[order] = np.arange(len(order))
+                return uniques[order], rank[inverse], counts[order]
+        uniques, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+        return uniques, inverse.reshape(-1), counts
+
+    def groupby(self, key):
+        """
+        dict of value -> Filenames of the paths with that value
+
+        key:    'ext', 'depth', 'folder' or 'basename' or an array with a value per path
+        """
+        np = self._np
+        uniques, inverse, counts = self._factorize(self._column(key))
+        order = np.argsort(inverse, kind='stable')
+        groups = {}
+        for value, index in zip(uniques.tolist(), np.split(order, np.cumsum(counts)[:-1])):
+            groups[value] = self.filter(index)
+        return groups
+
+    def counts(self, key):
+        """ dict of value -> number of paths, key as for groupby """
+        uniques, inverse, counts = self._factorize(self._column(key))
+        return dict(zip(uniques.tolist(), counts.tolist()))
+
+    def extcounts(self):
+        """ dict of lower case extention -> number of paths """
+        return self.counts('ext')
+
+    def depthcounts(self):
+        """ dict of depth -> number of paths """
+        return self.counts('depth')
+
+
 ## 
 # there is much less overhead if sorting with this function than using PathStr implicit sort methods
 # this function does give different results to using the implicit sort of PathStr variables using the
@@ -395,27 +1276,505 @@ class Filenames(TypedList):
 # this will cause 'filename (1).f to be sorted first
 
 
-def humansort(l):
+# splits a string into its text and number sections: the numbers are always
+# at the odd indices of the result (the first and last sections are text,
+# possibly empty)
+humanSplitRE = re.compile('([0-9]+)')
+
+
+def humansortkey(s):
+    """
+    key that sorts strings in the way that humans expect (see humansort):
+    a tuple of the lower case text and the int value of the numbers in s
+    """
+    parts = humanSplitRE.split(s.lower())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+
+# keys of strings that were sorted before, for sorting the same (or
+# overlapping) lists again with memo=True
+_humansortkeycached = functools.lru_cache(maxsize=2**20)(humansortkey)
+
+
+def _humankey(memo):
+    return _humansortkeycached if memo else humansortkey
+
+
+def humansort(l, inplace=False, reverse=False, memo=False):
     """ Sort the given list in the way that humans expect.
+
+    l:          list of strings (or a Filenames)
+    inplace:    sort l itself (and return None, as list.sort) rather than
+                returning a new sorted list
+    reverse:    largest first
+    memo:       keep the keys (up to about a million of them) so that sorting
+                the same strings again doesn't work them out again
+    """
+    key = _humankey(memo)
+    if not inplace:
+        return sorted(l, key=key, reverse=reverse)
+    if isinstance(l, ColumnarFilenames):
+        # no list of the paths to sort, the columns are put in the sorted order
+        paths = l.getstrlist()
+        l._reorder(sorted(range(len(paths)), key=lambda i: key(paths[i]), reverse=reverse))
+        return
+    if isinstance(l, TypedList):
+        l = l._list
+    l.sort(key=key, reverse=reverse)
+
+
+def humansmallest(l, k, memo=False):
+    """
+    the first k strings of l in humansort order, without sorting all of l
+    (a heap of k entries is kept while going through l)
+    """
+    return heapq.nsmallest(k, l, key=_humankey(memo))
+
+
+def humanlargest(l, k, memo=False):
+    """ the last k strings of l in humansort order (largest first), see humansmallest """
+    return heapq.nlargest(k, l, key=_humankey(memo))
+
+## scandir helpers
+
+# DirEntry.is_file/is_dir can raise OSError, os.path.isfile/isdir would
+# just return False in that case
+def _entryisfile(entry):
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+def _entryisdir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _scandir(folder):
+    """
+    returns a list of the os.DirEntry objects in folder
+    the entries cache their file type so no extra stat calls are needed to
+    tell files and folders apart
+    """
+    with os.scandir(folder) as it:
+        return list(it)
+
+
+def _readfolder(folder):
+    """
+    reads folder, returns lists of os.DirEntry objects for its subfolders and
+    for everything else, or None if the folder cannot be read
+    """
+    try:
+        entries = _scandir(folder)
+    except OSError:
+        return None
+
+    subfolders = []
+    files = []
+    for entry in entries:
+        if _entryisdir(entry):
+            subfolders.append(entry)
+        else:
+            files.append(entry)
+
+    return subfolders, files
+
+
+## shared stat cache
+
+
+class StatCache(object):
+    """
+    process wide cache of stat results, shared by every PathStr (see the
+    statcache instance below), least recently used paths are dropped once
+    there are more than $maxsize of them and results older than $ttl seconds
+    are stat'ed again (ttl=None: results never expire, only invalidate
+    clears them)
+
+    the cache is off (maxsize=0) unless turned on:
+
+        FnF.statcache.maxsize = 100000
+        FnF.statcache.ttl = 5
+
+    when on, PathStr.exists/isdir (and anything else that uses _getStat, like
+    Filenames.prefetchstat and Snapshot) go through it, so two PathStr's for
+    the same path share one stat and a long lived PathStr sees a fresh stat
+    once the cached one expires or is invalidated. DirIndex uses it for the
+    folder mtimes if a ttl is set and FilenamesWatcher invalidates the paths
+    it gets events for.
+
+    paths are cached as they are given (relative paths are not made absolute)
+    """
+
+    def __init__(self, maxsize=0, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # (path, lstat) -> (time.monotonic() when stat'ed, stat result or 'no_exist')
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, path, lstat=False, entry=None):
+        """
+        stat result for path, from the cache if it is there and not older than
+        ttl. Missing files give 'no_exist' (and that is cached too), any other
+        OSError is raised. $entry is an os.DirEntry for path, used instead of a
+        stat call the first time the path is seen. With the cache off this is
+        just refresh (hits and misses are only counted when it is on)
+        """
+        if not self.maxsize:
+            return self.refresh(path, lstat, entry)
+        key = (path, lstat)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and (self.ttl is None or time.monotonic() - cached[0] < self.ttl):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        # an entry caches its own stat forever, only trust it the first time
+        return self.refresh(path, lstat, entry if cached is None else None)
+
+    def refresh(self, path, lstat=False, entry=None):
+        """ stat path now, whatever is in the cache, and cache the result """
+        try:
+            if entry is not None:
+                st = entry.stat(follow_symlinks=not lstat)
+            elif lstat:
+                st = os.lstat(path)
+            else:
+                st = os.stat(path)
+        except FileNotFoundError:
+            st = 'no_exist'
+        if self.maxsize:
+            self.put(path, st, lstat)
+        return st
+
+    def put(self, path, st, lstat=False):
+        key = (path, lstat)
+        with self._lock:
+            self._cache[key] = (time.monotonic(), st)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, path):
+        """ forget path (a folder with or without a trailing separator) """
+        path = path.rstrip(os.sep) or path
+        with self._lock:
+            for p in (path, os.path.join(path, '')):
+                self._cache.pop((p, False), None)
+                self._cache.pop((p, True), None)
+
+    def invalidatetree(self, folder):
+        """ forget folder and everything below it """
+        path = folder.rstrip(os.sep) or folder
+        folder = os.path.join(folder, '')
+        with self._lock:
+            for key in [k for k in self._cache if k[0] == path or k[0].startswith(folder)]:
+                del self._cache[key]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+statcache = StatCache()
+
+
+## persistent folder index
+
+
+class DirIndex(object):
+    """
+    persistent index of folder listings, each stored with the mtime of the
+    folder. A folder's mtime changes whenever an entry is added, removed or
+    renamed in it, so on a rescan only folders with a new mtime need to be
+    read again, the rest cost a single stat
+
+    pass as the index option of the recursive listing functions, either as a
+    DirIndex or as a filename:
+
+        files = listfilesext(root, rec=True, index='tree.index')
+
+    the index is saved to its file after every complete walk
+    """
+
+    # listings of folders modified this close to the time they were read are
+    # not trusted: a later change within the filesystem's mtime resolution
+    # would not change the mtime
+    RACY_NS = 2 * 10**9
+
+    class Entry(object):
+        """ stand in for an os.DirEntry loaded from the index """
+        __slots__ = ('name', 'path', '_isdir', '_isfile', '_islink')
+
+        def __init__(self, folder, name, isdir, isfile, islink):
+            self.name = name
+            self.path = os.path.join(folder, name)
+            self._isdir = isdir
+            self._isfile = isfile
+            self._islink = islink
+
+        def is_dir(self):
+            return self._isdir
+
+        def is_file(self):
+            return self._isfile
+
+        def is_symlink(self):
+            return self._islink
+
+        def stat(self, follow_symlinks=True):
+            return os.stat(self.path, follow_symlinks=follow_symlinks)
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        # folder -> (mtime_ns or None, [(name, isdir, isfile, islink), ...])
+        self._folders = {}
+        self._lock = threading.Lock()
+        self.reads = 0      # folders read from disk
+        self.hits = 0       # folders that were up to date in the index
+        if filename is not None and os.path.exists(filename):
+            self.load()
+
+    def __len__(self):
+        return len(self._folders)
+
+    def load(self):
+        with open(self.filename, 'rb') as f:
+            self._folders = pickle.load(f)
+
+    def save(self):
+        # write to a temporary file first so a crash never leaves half an index
+        tmp = self.filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self._folders, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.filename)
+
+    def invalidate(self, folder):
+        """ forget folder and everything below it """
+        folder = os.path.join(folder, '')
+        with self._lock:
+            for key in [k for k in self._folders if os.path.join(k, '').startswith(folder)]:
+                del self._folders[key]
+
+    def readfolder(self, folder):
+        """
+        same as _readfolder but uses the stored listing if the folder's mtime
+        has not changed
+        """
+        try:
+            if statcache.maxsize and statcache.ttl is not None:
+                # trust a folder's mtime for as long as the stat cache would
+                st = statcache.get(folder)
+            else:
+                st = statcache.refresh(folder)
+        except OSError:
+            return None
+        if st == 'no_exist':
+            return None
+        mtime = st.st_mtime_ns
+
+        cached = self._folders.get(folder)
+        if cached is not None and cached[0] == mtime:
+            with self._lock:
+                self.hits += 1
+            listing = cached[1]
+        else:
+            start = time.time_ns()
+            result = _readfolder(folder)
+            with self._lock:
+                self.reads += 1
+                if result is None:
+                    # under the lock like every change to _folders, invalidate
+                    # may be going through it on another thread
+                    self._folders.pop(folder, None)
+            if result is None:
+                return None
+
+            subfolders, files = result
+            listing = [(e.name, True, False, e.is_symlink()) for e in subfolders]
+            listing += [(e.name, False, _entryisfile(e), e.is_symlink()) for e in files]
+
+            if mtime >= start - self.RACY_NS:
+                mtime = None
+
+            # folders that have gone are dropped from the index
+            if cached is not None:
+                names = set(e.name for e in subfolders)
+                for name, isdir, isfile, islink in cached[1]:
+                    if isdir and name not in names:
+                        self.invalidate(os.path.join(folder, name))
+
+            with self._lock:
+                self._folders[folder] = (mtime, listing)
+            return result
+
+        subfolders = []
+        files = []
+        for name, isdir, isfile, islink in listing:
+            entry = DirIndex.Entry(folder, name, isdir, isfile, islink)
+            if isdir:
+                subfolders.append(entry)
+            else:
+                files.append(entry)
+
+        return subfolders, files
+
+
+def _walkopts(kwargs):
+    """
+    reads the options that control how a tree is walked from kwargs
+
+    **kwargs:   workers = int/[None]      read this many folders at once on a thread pool
+                ordered = True/[False]    with workers, give the results in the same
+                                          order as a serial walk
+                index = DirIndex/filename reuse the listings of unchanged folders
+
+    returns them as keyword arguments for _walk
+    """
+    opts = {}
+    if 'workers' in kwargs:
+        opts['workers'] = kwargs.pop('workers')
+    if 'ordered' in kwargs:
+        opts['ordered'] = kwargs.pop('ordered')
+    if 'index' in kwargs:
+        index = kwargs.pop('index')
+        if not isinstance(index, DirIndex):
+            index = DirIndex(index)
+        opts['index'] = index
+    return opts
+
+
+def _walk(root, prune=None, workers=None, ordered=False, index=None):
+    """
+    scandir based version of os.walk(root) (top down, symbolic links to folders
+    are not followed, folders that cannot be read are skipped)
+
+    yields (folder, subfolders, files) where subfolders and files are lists of
+    os.DirEntry objects
+
+    prune(path) is called for every folder, if it returns True the folder and
+    everything below it is skipped without ever being opened
+
+    if workers is given the folders are read on a thread pool, which pays off
+    when each read has to wait on a high latency (network) filesystem. The
+    results are yielded as they complete, unless ordered is True in which case
+    they come out in the same order as the serial walk
+
+    if index (a DirIndex) is given, folders that have not changed since they
+    were last read are taken from the index, which is saved once the walk is
+    complete
     """
-    # function that converts text into a number if possible
-    convert = lambda text: int(text) if text.isdigit() else text.lower()
-    # function that splits up a string into section that are either numeric or not
-    #       then converts each section to a number if possible
-    # returns a list where the members are either strings or ints
-    alphanum_key = lambda key: [convert(c) for c in re.split('([0-9]+)', key)]
-    # sorts the list of strings (filenames) based on the how the split lists are sorted
-    return sorted(l, key=alphanum_key)
+    if prune is not None and prune(root):
+        return
+
+    if index is not None:
+        readfolder = index.readfolder
+    else:
+        readfolder = _readfolder
+
+    # which subfolders should be walked next
+    def walkinto(subfolders):
+        paths = []
+        for entry in subfolders:
+            if entry.is_symlink():
+                continue
+            if prune is not None and prune(entry.path):
+                continue
+            paths.append(entry.path)
+        return paths
+
+    if not workers:
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            result = readfolder(folder)
+            if result is None:
+                continue
+
+            subfolders, files = result
+            yield folder, subfolders, files
+
+            # push in reverse so the folders are visited in the same order as os.walk
+            stack.extend(reversed(walkinto(subfolders)))
+
+    elif ordered:
+        # same as the serial walk but all subfolders of a folder are read ahead
+        # of time, as soon as the folder itself has been read
+        pool = ThreadPoolExecutor(workers)
+        stack = [(root, pool.submit(readfolder, root))]
+        try:
+            while stack:
+                folder, future = stack.pop()
+                result = future.result()
+                if result is None:
+                    continue
+
+                subfolders, files = result
+                yield folder, subfolders, files
+
+                children = [(path, pool.submit(readfolder, path)) for path in walkinto(subfolders)]
+                stack.extend(reversed(children))
+        finally:
+            for folder, future in stack:
+                future.cancel()
+            pool.shutdown()
+
+    else:
+        # keep a limited number of reads in flight, the rest wait on the stack
+        pool = ThreadPoolExecutor(workers)
+        maxpending = 2 * workers
+        stack = [root]
+        pending = {}
+        try:
+            while stack or pending:
+                while stack and len(pending) < maxpending:
+                    folder = stack.pop()
+                    pending[pool.submit(readfolder, folder)] = folder
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder = pending.pop(future)
+                    result = future.result()
+                    if result is None:
+                        continue
+
+                    subfolders, files = result
+                    yield folder, subfolders, files
+
+                    stack.extend(reversed(walkinto(subfolders)))
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown()
+
+    # the walk is complete, keep the index for the next time
+    if index is not None and index.filename is not None:
+        index.save()
+
 
 ## listfiles
 
 
-def listfiles(*args, **kwargs):
+def iterfiles(*args, **kwargs):
     """*args:   root_folder/[os.getcwd()]
 
-    **kwargs:   full = True/False  [rec]    return a full path to the file (default value depends on $rec)
+    **kwargs:   full = True/[False]     return a full path to the file
     
-    Return a list of all file contained within a folder (not recursive)
+    Generator version of listfiles, yields a PathStr for each file as the folder is read
     """
 
     # check arguments
@@ -430,26 +1789,37 @@ def listfiles(*args, **kwargs):
     else:
         root = os.getcwd()  # default
     
-    # get all files and folders, only put them in the list if they are are a file
-    files = [f for f in os.listdir(root) if os.path.isfile(os.path.join(root, f))]  # list comprehension
+    # get all files and folders, only yield them if they are are a file
+    with os.scandir(root) as it:
+        for entry in it:
+            if _entryisfile(entry):
+                if full:
+                    yield PathStr._listed(entry.path, False)   # same as os.path.join(root, entry.name)
+                else:
+                    yield PathStr._listed(entry.name, False, root)
+
 
-    if full:
-        for i, f in enumerate(files):
-            files[i] = os.path.join(root, f)
+def listfiles(*args, **kwargs):
+    """*args:   root_folder/[os.getcwd()]
+
+    **kwargs:   full = True/[False]     return a full path to the file
+    
+    Return a list of all file contained within a folder (not recursive)
+    """
 
-    # convert list into a Filenames object
+    # convert files into a Filenames object
     # pass back list of files
-    return Filenames(files)
+    return Filenames(iterfiles(*args, **kwargs))
 
 ## listsubdir
 
 
-def listsubdir(*args, **kwargs):
+def itersubdir(*args, **kwargs):
     """*args:   root_folder/[os.getcwd()]
 
     **kwargs:   full = True/False     return a full path to the file
     
-    Returns a list of all subfolders (not recursive)
+    Generator version of listsubdir, yields a PathStr for each subfolder as the folder is read
     """
 
     # check arguments
@@ -466,16 +1836,27 @@ def listsubdir(*args, **kwargs):
     else:
         root = os.getcwd()  # default
     
-    # get all files and folders, only put them in the list if they are a folder    
-    dirs = [os.path.join(f,'') for f in os.listdir(root) if os.path.isdir(os.path.join(root, f))]  # list comprehension
+    # get all files and folders, only yield them if they are a folder    
+    with os.scandir(root) as it:
+        for entry in it:
+            if _entryisdir(entry):
+                if full:
+                    yield PathStr._listed(os.path.join(entry.path, ''), True)
+                else:
+                    yield PathStr._listed(os.path.join(entry.name, ''), True, root)
 
-    if full:
-        for i, d in enumerate(dirs):
-            dirs[i] = os.path.join(root, d)
+
+def listsubdir(*args, **kwargs):
+    """*args:   root_folder/[os.getcwd()]
+
+    **kwargs:   full = True/False     return a full path to the file
+    
+    Returns a list of all subfolders (not recursive)
+    """
     
-    # convert list into a Filenames object
+    # convert folders into a Filenames object
     # pass back list of sub folders
-    return Filenames(dirs)
+    return Filenames(itersubdir(*args, **kwargs))
     
 ## splitsep
 
@@ -491,34 +1872,20 @@ def splitsep(pathlist):
     
     return pathlist
     
-    
-## listsubdirrec
 
-def listsubdirrec(*args, **kwargs):
-    """ 
-    *args:      root_folder/[os.getcwd()]   top folder to recurse from
-    
+## inc/dinc/system options
+
+
+def _incdinc(kwargs):
+    """
+    reads the options shared by the recursive listing functions from kwargs
+
     **kwargs:   inc = []                  strings that must be in the paths
                 dinc = []                 strings that must not be in the paths
                 system = True/[False]     include system paths (if false adds '/.' and '/_' to dinc)
-    
-    Returns a recursive list of all subfolders
-    """
-    
-    # ---- GET INPUTS ----- #
-    
-    # set top level folder (either from input or use default)
-    if len(args) == 1:
-        root = args[0]  # from first input
-    else:
-        root = os.getcwd()  # default
-    
-    # split
-    if 'split' in kwargs:
-        split = kwargs['split']
-    else:
-        split = False
 
+    returns the inc and dinc lists
+    """
     # inc(lude)
     inc = []
     if 'inc' in kwargs:
@@ -557,41 +1924,215 @@ def listsubdirrec(*args, **kwargs):
             dinc.append(dot)
         if underscore not in dinc:
             dinc.append(underscore)
-    
-    # -------- BEGIN --------- #
-    
-    pathlist = []
-    
-    # add each sub folder of the root (and the root its self to the path)
-    for folder, subfolders, files in os.walk(root):
-        # only add folders that meet the $inc and $dinc conditions 
-        OK = True 
-        
-        for incStr in inc:
-            if incStr not in folder:
-                OK = False
-            
-        for dincStr in dinc:
-            if dincStr in folder:
-                OK = False
-            
-        if OK:
-            pathlist.append(os.path.join(folder, ''))
-    
-    # pass back list of sub folders
-    return Filenames(pathlist)
-    
-    # ---------- END -------------- #
-    
-## listfilesext
 
+    return inc, dinc
 
-def listfilesext(*args, **kwargs):
+
+class _ScanFilter(object):
     """
-    *args:      root_folder/[os.getcwd()]   top folder to recurse from
-    
-    **kwargs:   ext = []                    list of file extention to include (i.e. ['.jpg','.bmp'])  
-                rec = True/[False]          recursively look in all sub directorys
+    the inc, dinc, system and ext options of the listing functions, used to
+    decide which folders are walked and which files are listed
+
+    the options are compiled once per call: all the $dinc strings into a
+    single regular expression (one search finds any of them) and the
+    extentions into a frozenset
+    """
+
+    def __init__(self, kwargs):
+        inc, dinc = _incdinc(kwargs)
+
+        # what extentions to include
+        ext = []  # default (all extenstions)
+        if 'ext' in kwargs:
+            ext = kwargs.pop('ext')
+
+        self.ext = frozenset(e.lower() for e in ext)  # make ext all lower case
+        self.allext = not self.ext                    # True if ext list is empty
+
+        # the longest strings are the least likely to match, test them first so
+        # that a path that fails is rejected as soon as possible
+        self.inc = sorted(set(inc), key=len, reverse=True)
+        self.dinc = dinc
+        if dinc:
+            self._dincSearch = re.compile('|'.join(re.escape(d) for d in dinc)).search
+        else:
+            self._dincSearch = None
+
+    # if a $dinc string is in a folder path it is also in the path of every
+    # folder below it, so these folders don't need to be walked at all
+    def prune(self, folder):
+        return self._dincSearch is not None and self._dincSearch(folder) is not None
+
+    # only use folders that meet the $inc conditions ($dinc folders are pruned)
+    def folderok(self, folder):
+        for incStr in self.inc:
+            if incStr not in folder:
+                return False
+        return True
+
+    # only use files that have the required extentions and meet the $inc and
+    # $dinc conditions
+    def fileok(self, File):
+        if not self.allext and _extof(File) not in self.ext:
+            return False
+
+        sepFile = os.sep + File
+        for incStr in self.inc:
+            if incStr not in sepFile:
+                return False
+
+        return self._dincSearch is None or self._dincSearch(sepFile) is None
+
+    def files(self, entries, full, folder):
+        """
+        yields a PathStr for each entry (listed from $folder) that is a file and
+        passes fileok (full: use the folder joined with the filename, else just
+        the filename)
+        """
+        for entry in entries:
+            if _entryisfile(entry) and self.fileok(entry.name):
+                if full:
+                    yield PathStr._listed(entry.path, False)
+                else:
+                    yield PathStr._listed(entry.name, False, folder)
+
+    
+## listsubdirrec
+
+def itersubdirrec(*args, **kwargs):
+    """ 
+    *args:      root_folder/[os.getcwd()]   top folder to recurse from
+    
+    **kwargs:   inc = []                  strings that must be in the paths
+                dinc = []                 strings that must not be in the paths
+                system = True/[False]     include system paths (if false adds '/.' and '/_' to dinc)
+                workers = int/[None]      read this many folders at once on a thread pool
+                ordered = True/[False]    with workers, keep the order of a serial walk
+                index = DirIndex/filename only read folders that changed since the last walk
+    
+    Generator version of listsubdirrec, yields a PathStr for each subfolder as the tree is walked
+    """
+    
+    # ---- GET INPUTS ----- #
+    
+    # set top level folder (either from input or use default)
+    if len(args) == 1:
+        root = args[0]  # from first input
+    else:
+        root = os.getcwd()  # default
+    
+    # split
+    if 'split' in kwargs:
+        split = kwargs['split']
+    else:
+        split = False
+
+    filt = _ScanFilter(kwargs)
+    walkopts = _walkopts(kwargs)
+    
+    # -------- BEGIN --------- #
+    
+    # yield each sub folder of the root (and the root its self)
+    for folder, subfolders, files in _walk(root, filt.prune, **walkopts):
+        # only yield folders that meet the $inc conditions ($dinc folders have been pruned)
+        if filt.folderok(folder):
+            yield PathStr(os.path.join(folder, ''))
+    
+    # ---------- END -------------- #
+
+
+def listsubdirrec(*args, **kwargs):
+    """ 
+    *args:      root_folder/[os.getcwd()]   top folder to recurse from
+    
+    **kwargs:   inc = []                  strings that must be in the paths
+                dinc = []                 strings that must not be in the paths
+                system = True/[False]     include system paths (if false adds '/.' and '/_' to dinc)
+                workers = int/[None]      read this many folders at once on a thread pool
+                ordered = True/[False]    with workers, keep the order of a serial walk
+                index = DirIndex/filename only read folders that changed since the last walk
+    
+    Returns a recursive list of all subfolders
+    """
+    
+    # pass back list of sub folders
+    return Filenames(itersubdirrec(*args, **kwargs))
+    
+## listfilesext
+
+
+# natural sort key of a path, the same as PathStr(path).sortkey
+def _naturalpathkey(path):
+    head, tail = os.path.split(path)
+    name, ext = os.path.splitext(tail)
+    return (_naturalkey(head), _naturalkey(name), _naturalkey(ext), path)
+
+
+def _sortedwalk(root, filt, full, sort, rec=True, index=None):
+    """
+    yields the files below root in sorted order ('natural': PathStr.sortkey,
+    'human': humansortkey of the full paths) as the folders are read
+
+    a heap holds the files that have been found but not yet yielded and, for
+    each folder that has been found but not yet read, a lower bound of the key
+    of anything in it: a key only gets bigger as a path gets longer, so no
+    file in a folder can come before the folder's path (with a separator on
+    the end for 'human'). A folder is read when its bound comes to the top of
+    the heap, so the heap only ever holds the folders and files next to the
+    current path (depth x width), not the whole tree
+    """
+    if sort == 'natural':
+        filekey = _naturalpathkey
+
+        def folderkey(folder):
+            return (_naturalkey(os.path.split(os.path.join(folder, 'x'))[0]),)
+    elif sort == 'human':
+        filekey = humansortkey
+
+        def folderkey(folder):
+            return humansortkey(os.path.join(folder, ''))
+    else:
+        raise TypeError("sort must be 'natural' or 'human'")
+
+    readfolder = index.readfolder if index is not None else _readfolder
+
+    if rec and filt.prune(root):
+        return
+    seq = itertools.count()     # ties are broken by the order things were found
+    heap = [(folderkey(root), next(seq), root, None, None)]
+    while heap:
+        key, _, path, name, folder = heapq.heappop(heap)
+        if name is not None:
+            # a file
+            if full:
+                yield PathStr._listed(path, False)
+            else:
+                yield PathStr._listed(name, False, folder)
+            continue
+
+        result = readfolder(path)
+        if result is None:
+            continue
+        subfolders, files = result
+        if not rec or filt.folderok(path):
+            for f in files:
+                if _entryisfile(f) and filt.fileok(f.name):
+                    heapq.heappush(heap, (filekey(f.path), next(seq), f.path, f.name, path))
+        if rec:
+            for d in subfolders:
+                if not d.is_symlink() and not filt.prune(d.path):
+                    heapq.heappush(heap, (folderkey(d.path), next(seq), d.path, None, None))
+
+    if index is not None and index.filename is not None:
+        index.save()
+
+
+def iterfilesext(*args, **kwargs):
+    """
+    *args:      root_folder/[os.getcwd()]   top folder to recurse from
+    
+    **kwargs:   ext = []                    list of file extention to include (i.e. ['.jpg','.bmp'])  
+                rec = True/[False]          recursively look in all sub directorys
                 full = True/False  [rec]    return a full path to the file (default value depends on $rec)
                 
                 --listsubdirrec opts.-- used if recursive option is selected
@@ -599,9 +2140,19 @@ def listfilesext(*args, **kwargs):
                 system = True/[False]       include system paths (folders that start with /. or /_)
                 inc = []                    strings that must be in the paths
                 dinc = []                   strings that must not be in the paths
+                workers = int/[None]        read this many folders at once on a thread pool
+                ordered = True/[False]      with workers, keep the order of a serial walk
+                index = DirIndex/filename   only read folders that changed since the last walk
+
+                sort = [None]/'natural'/'human'
+                                            yield the files already sorted ('natural': the order
+                                            of Filenames.sort, 'human': the order of humansort,
+                                            both of the full paths) while the folders are read,
+                                            only the folders and files next to the current path
+                                            are kept in memory (workers/ordered are not used)
                      
     
-    Returns a list of all files with the specified extentions (optionally recursive)
+    Generator version of listfilesext, yields a PathStr for each file as the folders are read
     """
     
     # -------- GET INPUTS ---------- #
@@ -612,18 +2163,6 @@ def listfilesext(*args, **kwargs):
     else:
         root = os.getcwd()  # default
     
-    # what extentions to include
-    ext = []  # default (all extenstions)
-    if 'ext' in kwargs:
-        ext = kwargs.pop('ext')
-    
-    ext = [e.lower() for e in ext]  # make ext all lower case
-        
-    if not ext:        # True if ext list is empty
-        allext = True
-    else:
-        allext = False
-    
     # recursive?
     rec = False
     if 'rec' in kwargs:
@@ -634,98 +2173,902 @@ def listfilesext(*args, **kwargs):
     if 'full' in kwargs:
         full = kwargs.pop('full')
 
-    # these kwargs should be passed forward to listsubdirrec as well
-    
-    # inc(lude)
-    inc = []    
-    if 'inc' in kwargs:
-        # for each seperate string in $kwargs['inc'] append that string to the inc list
-        # check that entries in $kwargs['inc'] are actually strings
-        for s in kwargs['inc']:
-            if type(s) is str:
-                inc.append(s)
-            else:
-                raise Exception("inc must be a list of strings")
-        
-    # d(ont)inc(lude)
-    dinc = []    
-    if 'dinc' in kwargs:
-        # for each seperate string in$ kwargs['dinc'] append that string to the dinc list
-        # check that entries in $kwargs['dinc'] are actually strings
-        for s in kwargs['dinc']:
-            if type(s) is str:
-                dinc.append(s)
-            else:
-                raise Exception("dinc must be a list of strings")
-        
-    # system (folders)
-    # if $system is false add '/.' and '/_' to the $dinc list
-    if 'system' in kwargs:
-        system = kwargs['system']
-    else:
-        system = False
-        
-    sep = os.sep
-    dot = (sep + '.')
-    underscore = (sep + '_')
-    
-    if not system:
-        if dot not in dinc:
-            dinc.append(dot)
-        if underscore not in dinc:
-            dinc.append(underscore)
+    # sorted?
+    sort = None
+    if 'sort' in kwargs:
+        sort = kwargs.pop('sort')
+
+    # these kwargs are shared with listsubdirrec
+    filt = _ScanFilter(kwargs)
+    walkopts = _walkopts(kwargs)
     
     # --------- BEGIN ------------- #
+
+    if sort is not None:
+        yield from _sortedwalk(root, filt, full, sort, rec, walkopts.get('index'))
+        return
     
-    # --get folders to look for files in, either just root, or all recursive folders
+    # --get the files of either just root, or all recursive folders
+    # folders are walked only once: the files are collected from the same
+    # listing that is used to find the sub folders
     
     if rec:
-        # get list of folders of recursively, pass forward any unused $kwargs
-        folderlist = listsubdirrec(root, **kwargs)
+        for folder, subfolders, files in _walk(root, filt.prune, **walkopts):
+            # only use folders that meet the listsubdirrec conditions
+            # ($dinc folders are pruned from the walk)
+            if filt.folderok(folder):
+                yield from filt.files(files, full, folder)
     else:
-        # or just use root folder
-        folderlist = [root]
+        # or just use root folder (the entries are read as they are used)
+        with os.scandir(root) as it:
+            yield from filt.files(it, full, root)
     
-    # --end get folders
+    # ---------- END -------------- #
+
+
+def listfilesext(*args, **kwargs):
+    """
+    *args:      root_folder/[os.getcwd()]   top folder to recurse from
     
-    # --get files and add to filelist if they have the right extention
+    **kwargs:   ext = []                    list of file extention to include (i.e. ['.jpg','.bmp'])  
+                rec = True/[False]          recursively look in all sub directorys
+                full = True/False  [rec]    return a full path to the file (default value depends on $rec)
+                
+                --listsubdirrec opts.-- used if recursive option is selected
+                
+                system = True/[False]       include system paths (folders that start with /. or /_)
+                inc = []                    strings that must be in the paths
+                dinc = []                   strings that must not be in the paths
+                workers = int/[None]        read this many folders at once on a thread pool
+                ordered = True/[False]      with workers, keep the order of a serial walk
+                index = DirIndex/filename   only read folders that changed since the last walk
+                sort = [None]/'natural'/'human'   sorted as it is listed (see iterfilesext)
+
+                columnar = True/[False]     return a ColumnarFilenames (stores each folder once)
+                     
     
-    filelist = []
-    for folder in folderlist:
-        
-        # output fullpath? create fullpath, prefix for this folder
-        if full:
-            CurrPath = folder
+    Returns a list of all files with the specified extentions (optionally recursive)
+    """
+    
+    columnar = False
+    if 'columnar' in kwargs:
+        columnar = kwargs.pop('columnar')
+
+    if columnar:
+        return ColumnarFilenames(iterfilesext(*args, **kwargs))
+    return Filenames(iterfilesext(*args, **kwargs))
+    
+    
+## external sort
+
+
+# a path being sorted in memory takes about this many times its own size
+# (sys.getsizeof) once its sort key is made (measured with tracemalloc)
+_SORTCOST = 8
+
+# runs merged at once, more runs than this are merged in several passes
+_MERGEFANIN = 64
+
+
+def _writepaths(f, paths, delimiter='\n', chunksize=1000):
+    """
+    writes the paths to the (text) file object f, each one followed by the
+    delimiter, chunksize paths at a time. Returns the number of paths written
+    """
+    n = 0
+    it = iter(paths)
+    while True:
+        chunk = list(itertools.islice(it, chunksize))
+        if not chunk:
+            return n
+        chunk.append('')
+        f.write(delimiter.join(chunk))
+        n += len(chunk) - 1
+
+
+def _exportpaths(out, paths, delimiter='\n', chunksize=10000):
+    """ _writepaths to a file object or a filename, $delimiter can also be 'jsonl' """
+    if delimiter == 'jsonl':
+        # (json escapes the surrogates of undecodable names)
+        paths = map(json.dumps, paths)
+        delimiter = '\n'
+    elif delimiter not in ('\n', '\0'):
+        raise TypeError("delimiter must be '\\n', '\\0' or 'jsonl'")
+    if isinstance(out, str):
+        with _openrun(out, 'w') as f:
+            return _writepaths(f, paths, delimiter, chunksize)
+    return _writepaths(out, paths, delimiter, chunksize)
+
+
+def _readpaths(f, delimiter='\0', bufsize=2**16):
+    """ yields the paths written to the (text) file object f by _writepaths """
+    rest = ''
+    while True:
+        buf = f.read(bufsize)
+        if not buf:
+            return
+        parts = (rest + buf).split(delimiter)
+        rest = parts.pop()
+        yield from parts
+
+
+def _openrun(path, mode, bufsize=-1):
+    # paths are not always valid utf-8 (os.fsdecode uses surrogateescape) and
+    # may contain new lines, so no newline translation either
+    return open(path, mode, buffering=bufsize, encoding='utf-8', errors='surrogateescape', newline='')
+
+
+def _mergeruns(runs, key, bufsize):
+    """ yields the paths of the sorted run files in order (ties in the order of runs) """
+    files = [_openrun(r, 'r', bufsize) for r in runs]
+    try:
+        yield from heapq.merge(*[_readpaths(f, '\0', bufsize) for f in files], key=key)
+    finally:
+        for f in files:
+            f.close()
+
+
+def _externalsort(source, key, maxmemory, tmpdir):
+    folder = tempfile.mkdtemp(prefix='fnfsort', dir=tmpdir)
+    try:
+        # sorted runs of at most $maxmemory
+        runs = []
+        it = iter(source)
+        while True:
+            run = []
+            size = 0
+            for v in it:
+                run.append(v)
+                size += _SORTCOST * sys.getsizeof(v)
+                if size >= maxmemory:
+                    break
+            if not run:
+                break
+            run.sort(key=key)
+            if not runs and size < maxmemory:
+                # everything fitted in memory
+                yield from run
+                return
+            runs.append(os.path.join(folder, str(len(runs))))
+            with _openrun(runs[-1], 'w') as f:
+                _writepaths(f, run, '\0')
+            del run
+
+        # merge, $_MERGEFANIN runs at a time, each with a share of $maxmemory to
+        # read with. Runs next to each other are merged together so that equal
+        # keys stay in the order they came in
+        bufsize = max(maxmemory // (2 * (_MERGEFANIN + 1)), 4096)
+        names = itertools.count(len(runs))
+        while len(runs) > _MERGEFANIN:
+            merged = []
+            for i in range(0, len(runs), _MERGEFANIN):
+                merged.append(os.path.join(folder, str(next(names))))
+                with _openrun(merged[-1], 'w', bufsize) as f:
+                    _writepaths(f, _mergeruns(runs[i:i + _MERGEFANIN], key, bufsize), '\0')
+                for r in runs[i:i + _MERGEFANIN]:
+                    os.remove(r)
+            runs = merged
+        yield from _mergeruns(runs, key, bufsize)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def externalsort(source, order='natural', maxmemory=2**28, tmpdir=None, out=None, delimiter='\n', **kwargs):
+    """
+    sorts more paths than fit in memory: sorted runs of at most $maxmemory
+    bytes are written to temporary files, which are then merged
+
+    source:     iterable of path str's (e.g. a generator or iterfilesext), or a
+                folder: the files from iterfilesext(source, **kwargs)
+    order:      ['natural']/'human'     the order of Filenames.sort (PathStr.sortkey)
+                                        or of humansort
+    maxmemory:  [2**28]                 about the most memory to use, in bytes
+    tmpdir:     [None]                  where the runs are written (tempfile's default)
+    out:        [None]/filename/file    write the sorted paths there (see Filenames.export)
+    delimiter:  ['\\n']/'\\0'/'jsonl'  how the paths are written to $out
+
+    **kwargs:   iterfilesext options, if source is a folder
+
+    Returns an iterator of the sorted paths (str's), or the number of paths
+    written if $out is given. The temporary files are removed once the
+    iterator is used up (or closed)
+    """
+    if order == 'natural':
+        key = _naturalpathkey
+    elif order == 'human':
+        key = humansortkey
+    else:
+        raise TypeError("order must be 'natural' or 'human'")
+
+    if isinstance(source, str):
+        source = iterfilesext(source, **kwargs)
+    elif kwargs:
+        raise TypeError('unexpected keyword arguments: ' + ', '.join(kwargs))
+
+    paths = _externalsort(source, key, maxmemory, tmpdir)
+    if out is None:
+        return paths
+    return _exportpaths(out, paths, delimiter)
+
+
+## glob patterns
+
+
+_magicRE = re.compile('[*?[]')
+
+
+def _globsegments(pattern):
+    """
+    splits a glob pattern into its segments, each one of:
+
+        ('any', '**')                   any number of folders (including none)
+        ('lit', name)                   a fixed name
+        ('pat', (match, dotted))        a fnmatch pattern (compiled), dotted is True
+                                        if the pattern itself starts with a dot
+    """
+    segments = []
+    for seg in pattern.replace('/', os.sep).split(os.sep):
+        if seg in ('', '.'):
+            continue
+        if seg == '**':
+            if not segments or segments[-1][0] != 'any':
+                segments.append(('any', seg))
+        elif _magicRE.search(seg):
+            segments.append(('pat', (re.compile(fnmatch.translate(seg)).match, seg.startswith('.'))))
         else:
-            CurrPath = ''
-        
-        # for each folder get the files within
-        filelist_sub = listfiles(folder)
-        
-        for File in filelist_sub:
-            # for each file only use ones that have the required extentions
-            _, fext = os.path.splitext(File)
-            if (fext.lower() in ext) or allext:
-                # only add files that meet the $inc and $dinc conditions 
-                OK = True 
-                for incStr in inc:
-                    if incStr not in (sep + File):
-                        OK = False
-                    
-                for dincStr in dinc:
-                    if dincStr in (sep + File):
-                        OK = False
-                    
-                if OK:
-                    file_full = os.path.join(CurrPath, File)
-                    filelist.append(file_full)
-    
-    # -- end add to filelist    
-    
-    return Filenames(filelist)
+            segments.append(('lit', seg))
+    return segments
+
+
+def _globclosure(segments, states):
+    # a '**' can match no folders at all, so being at one also means being
+    # at the segment after it
+    closure = set()
+    for i in states:
+        while i < len(segments) and segments[i][0] == 'any':
+            closure.add(i)
+            i += 1
+        closure.add(i)
+    return closure
+
+
+def _globstep(segments, states, name):
+    # the states after matching one more path segment, $name, from $states
+    # (names that start with a dot are only matched by a segment that does)
+    hidden = name.startswith('.')
+    after = set()
+    for i in states:
+        if i == len(segments):
+            continue
+        kind, val = segments[i]
+        if kind == 'any':
+            if not hidden:
+                after.add(i)
+        elif kind == 'lit':
+            if name == val:
+                after.add(i + 1)
+        elif (not hidden or val[1]) and val[0](name):
+            after.add(i + 1)
+    return _globclosure(segments, after)
+
+
+def iterglob(pattern, *args, **kwargs):
+    """
+    pattern:    glob pattern, i.e. '**/raw/*/2024-*/*.parquet'
+                    *   anything in a name (except a leading dot)
+                    ?   any one character
+                    [ ] any character in the brackets (fnmatch)
+                    **  any number of folders (including none), as a whole segment
+                a pattern that ends with a separator matches folders instead of files
+
+    *args:      root_folder/['']            folder the pattern is relative to, if not
+                                            given the paths are relative to the cwd
+                                            (as the pattern is) or absolute
+
+    **kwargs:   ext = []                    list of file extention to include (i.e. ['.jpg','.bmp'])
+                system = [True]/False       include system paths (as the listing functions,
+                                            but by default left to the pattern)
+                inc = []                    strings that must be in the paths
+                dinc = []                   strings that must not be in the paths
+
+    only the folders that can still match the rest of the pattern are read,
+    and a folder whose next pattern segments are all fixed names is not read
+    at all: those names are just stat'ed
+
+    yields a PathStr for each match
+    """
+    root = ''
+    if len(args) == 1:
+        root = args[0]
+    if os.path.isabs(pattern):
+        drive, pattern = os.path.splitdrive(pattern)
+        root = drive + os.sep
+
+    dirs = pattern.endswith(os.sep) or pattern.endswith('/')
+    segments = _globsegments(pattern)
+    end = len(segments)
+
+    kwargs.setdefault('system', True)
+    filt = _ScanFilter(kwargs)
+
+    # (folder, the states the folder is in: how much of the pattern it has matched)
+    stack = [(root, _globclosure(segments, [0]))]
+    if dirs and root and end in stack[0][1]:
+        yield PathStr(os.path.join(root, ''))
+    while stack:
+        folder, states = stack.pop()
+        live = [i for i in states if i != end]
+
+        if all(segments[i][0] == 'lit' for i in live):
+            # only fixed names can come next: check for them without a listing
+            entries = []
+            for name in sorted(set(segments[i][1] for i in live)):
+                path = os.path.join(folder, name)
+                try:
+                    st = statcache.get(path) if statcache.maxsize else statcache.refresh(path)
+                except OSError:
+                    continue
+                if st != 'no_exist':
+                    entries.append((name, path, stat.S_ISDIR(st.st_mode), False, None))
+        else:
+            try:
+                with os.scandir(folder or os.curdir) as it:
+                    listing = list(it)
+            except OSError:
+                continue
+            entries = []
+            for entry in listing:
+                isdir = _entryisdir(entry)
+                entries.append((entry.name, os.path.join(folder, entry.name), isdir,
+                                isdir and entry.is_symlink(), entry))
+
+        subfolders = []
+        for name, path, isdir, islink, entry in entries:
+            if islink:
+                # a '**' does not go into links to folders (they could loop)
+                after = _globstep(segments, [i for i in live if segments[i][0] != 'any'], name)
+            else:
+                after = _globstep(segments, live, name)
+            if not after:
+                continue
+            if isdir:
+                if filt.prune(path):
+                    continue
+                if dirs and end in after and filt.folderok(path):
+                    yield PathStr(os.path.join(path, ''))
+                if len(after) > 1 or end not in after:
+                    subfolders.append((path, after))
+            elif not dirs and end in after and filt.fileok(name) and filt.folderok(folder):
+                if entry is not None:
+                    yield PathStr._listed(path, False)
+                else:
+                    yield PathStr(path)
+
+        # depth first, in listing order
+        stack.extend(reversed(subfolders))
+
+
+def listglob(pattern, *args, **kwargs):
+    """
+    same as iterglob, returns a Filenames of all the matches
+    """
+    return Filenames(iterglob(pattern, *args, **kwargs))
+
+
+## async listing (asyncio)
+
+
+async def _awalk(root, prune=None, workers=8):
+    """
+    asyncio version of _walk, up to $workers folders are read at once on a
+    thread pool so the event loop is never blocked by a folder read
+
+    yields (folder, subfolders, files) in the order the reads complete
+    """
+    if prune is not None and prune(root):
+        return
+
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(workers)
+    stack = [root]
+    pending = {}
+    try:
+        while stack or pending:
+            while stack and len(pending) < workers:
+                folder = stack.pop()
+                pending[loop.run_in_executor(pool, _readfolder, folder)] = folder
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                folder = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    continue
+
+                subfolders, files = result
+                yield folder, subfolders, files
+
+                for entry in reversed(subfolders):
+                    if entry.is_symlink():
+                        continue
+                    if prune is not None and prune(entry.path):
+                        continue
+                    stack.append(entry.path)
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+async def aitersubdirrec(*args, **kwargs):
+    """ 
+    *args:      root_folder/[os.getcwd()]   top folder to recurse from
     
-    # ---------- END -------------- #
+    **kwargs:   inc = []                  strings that must be in the paths
+                dinc = []                 strings that must not be in the paths
+                system = True/[False]     include system paths (if false adds '/.' and '/_' to dinc)
+                workers = [8]             how many folders are read at once
+    
+    Async generator version of listsubdirrec (use with async for), yields a
+    PathStr for each subfolder as the folder reads complete
+    """
+
+    # set top level folder (either from input or use default)
+    if len(args) == 1:
+        root = args[0]  # from first input
+    else:
+        root = os.getcwd()  # default
+
+    workers = 8
+    if 'workers' in kwargs:
+        workers = kwargs.pop('workers')
+
+    filt = _ScanFilter(kwargs)
+
+    async for folder, subfolders, files in _awalk(root, filt.prune, workers):
+        if filt.folderok(folder):
+            yield PathStr(os.path.join(folder, ''))
+
+
+async def aiterfilesext(*args, **kwargs):
+    """
+    *args:      root_folder/[os.getcwd()]   top folder to recurse from
     
+    **kwargs:   ext = []                    list of file extention to include (i.e. ['.jpg','.bmp'])  
+                rec = True/[False]          recursively look in all sub directorys
+                full = True/False  [rec]    return a full path to the file (default value depends on $rec)
+                system = True/[False]       include system paths (folders that start with /. or /_)
+                inc = []                    strings that must be in the paths
+                dinc = []                   strings that must not be in the paths
+                workers = [8]               how many folders are read at once
+    
+    Async generator version of listfilesext (use with async for), yields a
+    PathStr for each file as the folder reads complete
+    """
+
+    # set top level folder (either from input or use default)
+    if len(args) == 1:
+        root = args[0]  # from first input
+    else:
+        root = os.getcwd()  # default
+
+    # recursive?
+    rec = False
+    if 'rec' in kwargs:
+        rec = kwargs.pop('rec')
+
+    # fullpath?
+    full = rec
+    if 'full' in kwargs:
+        full = kwargs.pop('full')
+
+    workers = 8
+    if 'workers' in kwargs:
+        workers = kwargs.pop('workers')
+
+    filt = _ScanFilter(kwargs)
+
+    if rec:
+        async for folder, subfolders, files in _awalk(root, filt.prune, workers):
+            if filt.folderok(folder):
+                for f in filt.files(files, full, folder):
+                    yield f
+    else:
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, _scandir, root)
+        for f in filt.files(entries, full, root):
+            yield f
+
+    
+## snapshots
+
+
+SnapshotDiff = collections.namedtuple('SnapshotDiff', ['added', 'removed', 'modified', 'renamed'])
+
+
+class Snapshot(object):
+    """
+    the state of a set of files at one point in time, for each path the
+    size, mtime, device and inode number are recorded
+
+        before = Snapshot.scan(root, rec=True)
+        ...
+        changes = before.diff(Snapshot.scan(root, rec=True))
+    """
+
+    def __init__(self, files=None):
+        # path -> (size, mtime_ns, device, inode)
+        self._files = {}
+        if files is not None:
+            for f in files:
+                self.add(f)
+
+    @classmethod
+    def scan(cls, *args, **kwargs):
+        """
+        takes the same arguments as listfilesext (the paths are always full
+        paths) and records every file that is found
+        """
+        kwargs['full'] = True
+        snapshot = cls()
+        for f in iterfilesext(*args, **kwargs):
+            snapshot.add(f)
+        return snapshot
+
+    @classmethod
+    def load(cls, filename):
+        snapshot = cls()
+        with open(filename, 'rb') as f:
+            snapshot._files = pickle.load(f)
+        return snapshot
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            pickle.dump(self._files, f, pickle.HIGHEST_PROTOCOL)
+
+    def add(self, f):
+        """ records the current state of file f (a PathStr or str), files that don't exist are ignored """
+        if not isinstance(f, PathStr):
+            f = PathStr(f)
+        f._getStat()
+        if f.stat == 'no_exist':
+            return
+        st = f.stat
+        self._files[str(f)] = (st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino)
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def getstrlist(self):
+        return list(self._files)
+
+    def diff(self, newer):
+        """
+        compares this snapshot with a newer one, returns a SnapshotDiff of:
+
+            added       Filenames of paths only in the newer snapshot
+            removed     Filenames of paths only in this snapshot
+            modified    Filenames of paths in both with a different size, mtime or inode
+            renamed     list of (old PathStr, new PathStr) pairs for files that
+                        have moved but kept their inode (and size and mtime, an
+                        inode number can be reused by a new file)
+
+        runs in time linear in the number of files
+        """
+        old = self._files
+        new = newer._files
+
+        removed = [path for path in old if path not in new]
+        added = []
+        modified = []
+        for path, state in new.items():
+            oldstate = old.get(path)
+            if oldstate is None:
+                added.append(path)
+            elif oldstate != state:
+                modified.append(path)
+
+        # files that have been removed from one path and added at another but
+        # are still the same file (device and inode, renaming doesn't change the
+        # size or mtime either) have been renamed
+        renamed = []
+        if removed and added:
+            removedStates = {}
+            for path in removed:
+                removedStates[old[path]] = path
+
+            stillAdded = []
+            for path in added:
+                oldpath = removedStates.pop(new[path], None)
+                if oldpath is None:
+                    stillAdded.append(path)
+                else:
+                    renamed.append((PathStr(oldpath), PathStr(path)))
+
+            renamedFrom = set(oldpath for oldpath, path in renamed)
+            removed = [path for path in removed if path not in renamedFrom]
+            added = stillAdded
+
+        return SnapshotDiff(Filenames(added), Filenames(removed), Filenames(modified), renamed)
+
+    
+## watched listings (inotify)
+
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_inotifyEventStruct = struct.Struct('iIII')  # wd, mask, cookie, len (then the name)
+_libc = None
+
+
+def _getlibc():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise NotImplementedError('watching folders needs inotify, which is only available on Linux')
+        _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    return _libc
+
+
+class FilenamesWatcher(object):
+    """
+    *args:      root_folder/[os.getcwd()]   top folder to watch
+
+    **kwargs:   callback = function(event, PathStr)   called for each change
+                --listfilesext opts.-- ext, rec, full, system, inc, dinc
+
+    Lists the files in a folder like listfilesext and then keeps the listing
+    (the files attribute, a Filenames) up to date using inotify events
+    instead of listing the folder again and again. Linux only.
+
+    Each change is reported as (event, PathStr) where event is one of
+    'added', 'removed' or 'modified'. The changes are returned by poll, passed
+    to the callback and given by iterating over the watcher:
+
+        with FilenamesWatcher(dropfolder, ext=['.csv']) as watcher:
+            for event, f in watcher:
+                ...
+    """
+
+    _mask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR
+
+    def __init__(self, *args, **kwargs):
+        # set top level folder (either from input or use default)
+        if len(args) == 1:
+            self.root = args[0]  # from first input
+        else:
+            self.root = os.getcwd()  # default
+
+        self.callback = None
+        if 'callback' in kwargs:
+            self.callback = kwargs.pop('callback')
+
+        # recursive?
+        self.rec = False
+        if 'rec' in kwargs:
+            self.rec = kwargs.pop('rec')
+
+        # fullpath?
+        self.full = self.rec
+        if 'full' in kwargs:
+            self.full = kwargs.pop('full')
+
+        self._filter = _ScanFilter(kwargs)
+
+        self._libc = _getlibc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self.files = Filenames()
+        self._watches = {}   # watch descriptor -> folder
+        self._tracked = {}   # folder -> {filename: PathStr in self.files}
+
+        self._scan(self.root, [])
+
+    # -- watching
+
+    def _watch(self, folder):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), self._mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                # the folder may already have gone again
+                return
+            # anything else (out of watches: ENOSPC, see max_user_watches, or
+            # EACCES ...) would leave changes in the folder unseen
+            raise OSError(err, os.strerror(err), folder)
+        self._watches[wd] = folder
+
+    def _unwatch(self, folder):
+        for wd, f in list(self._watches.items()):
+            if f == folder:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _scan(self, root, changes):
+        """ watch and list root (and if recursive its subfolders), adding the files it contains """
+        if self.rec:
+            self._watch(root)
+            for folder, subfolders, files in _walk(root, self._filter.prune):
+                for entry in subfolders:
+                    if not entry.is_symlink() and not self._filter.prune(entry.path):
+                        self._watch(entry.path)
+                if self._filter.folderok(folder):
+                    for entry in files:
+                        self._add(folder, entry.name, changes, entry)
+        else:
+            # watch first so nothing is missed between the listing and the watch
+            self._watch(root)
+            for entry in _scandir(root):
+                self._add(root, entry.name, changes, entry)
+
+    # -- keeping the listing up to date
+
+    def _add(self, folder, name, changes, entry=None):
+        tracked = self._tracked.setdefault(folder, {})
+        if name in tracked or not self._filter.fileok(name):
+            return
+        path = os.path.join(folder, name)
+        if entry is not None:
+            if not _entryisfile(entry):
+                return
+        elif not os.path.isfile(path):
+            return
+
+        if self.full:
+            f = PathStr._listed(path, False)
+        else:
+            f = PathStr._listed(name, False, folder)
+        tracked[name] = f
+        self.files.append(f)
+        changes.append(('added', f))
+
+    def _remove(self, folder, name, changes):
+        f = self._tracked.get(folder, {}).pop(name, None)
+        if f is not None:
+            self.files.remove(f)
+            changes.append(('removed', f))
+
+    def _removefolder(self, folder, changes):
+        # a folder has been deleted or moved away, forget everything below it
+        below = os.path.join(folder, '')
+        for f in [f for f in self._tracked if f == folder or f.startswith(below)]:
+            for name in list(self._tracked[f]):
+                self._remove(f, name, changes)
+            del self._tracked[f]
+            self._unwatch(f)
+
+    def rescan(self):
+        """ lists everything again (used when events have been lost), returns the changes """
+        old = self._tracked
+        for wd in list(self._watches):
+            self._libc.inotify_rm_watch(self._fd, wd)
+        self._watches = {}
+        self._tracked = {}
+        self.files = Filenames()
+        self._scan(self.root, [])
+
+        # only report what is different from before
+        changes = []
+        for folder, names in old.items():
+            newnames = self._tracked.get(folder, {})
+            for name, f in names.items():
+                if name not in newnames:
+                    changes.append(('removed', f))
+        for folder, names in self._tracked.items():
+            oldnames = old.get(folder, {})
+            for name, f in names.items():
+                if name not in oldnames:
+                    changes.append(('added', f))
+        return changes
+
+    def _handle(self, wd, mask, name, changes):
+        if mask & IN_Q_OVERFLOW:
+            changes.extend(self.rescan())
+            return
+
+        folder = self._watches.get(wd)
+        if folder is None:
+            return
+        if mask & IN_IGNORED:
+            # the watched folder has been deleted
+            del self._watches[wd]
+            return
+
+        path = os.path.join(folder, name)
+        if mask & IN_ISDIR:
+            statcache.invalidatetree(path)
+            if not self.rec:
+                return
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                if not self._filter.prune(path):
+                    self._scan(path, changes)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._removefolder(path, changes)
+            return
+
+        statcache.invalidate(path)
+        if not self.rec or self._filter.folderok(folder):
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._add(folder, name, changes)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._remove(folder, name, changes)
+            elif mask & IN_CLOSE_WRITE:
+                f = self._tracked.get(folder, {}).get(name)
+                if f is not None:
+                    changes.append(('modified', f))
+
+    def poll(self, timeout=0):
+        """
+        handles the events that arrive within timeout seconds (None waits
+        until there is at least one event), returns a list of (event, PathStr)
+        """
+        changes = []
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changes
+
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = _inotifyEventStruct.unpack_from(data, offset)
+                offset += _inotifyEventStruct.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self._handle(wd, mask, name, changes)
+
+        if self.callback is not None:
+            for event, f in changes:
+                self.callback(event, f)
+        return changes
+
+    def __iter__(self):
+        # blocks waiting for changes
+        while self._fd is not None:
+            for change in self.poll(None):
+                yield change
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        if getattr(self, '_fd', None) is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
     
 ## 
 
@@ -394,17 +394,13 @@ class Filenames(TypedList):
 # this will cause 'filename (1).f to be sorted first
 
 
+from FnF import humansort as _humansort
+
 def humansort(l):
     """ Sort the given list in the way that humans expect.
+        (in place, the same order as the FnF module's humansort)
     """
-    # function that converts text into a number if possible
-    convert = lambda text: int(text) if text.isdigit() else text.lower()
-    # function that splits up a string into section that are either numeric or not
-    #       then converts each section to a number if possible
-    # returns a list where the members are either strings or ints
-    alphanum_key = lambda key: [convert(c) for c in re.split('([0-9]+)', key)]
-    # sorts the list of strings (filenames) based on the how the split lists are sorted
-    l.sort(key=alphanum_key)
+    _humansort(l, inplace=True)
 
 ## listfiles
 
@@ -10,5 +10,9 @@ setup(
    install_requires=[
       'pyAbstracts>=1',
       'StringQuartet>=1'
-   ]
+   ],
+   extras_require={
+      # Filenames.toarray / FilenamesArray
+      'numpy': ['numpy']
+   }
 )
\ No newline at end of file
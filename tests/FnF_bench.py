@@ -0,0 +1,754 @@
+## FnF benchmarks
+#
+# not part of the unit tests, run with:
+#
+#   python tests/FnF_bench.py [benchmark names]
+#
+# with no names every benchmark is run
+
+import os
+import re
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import FnF
+import StringQuartet
+
+
+## helpers
+
+# create a synthetic tree: $width folders per level, $depth levels and
+# $files files per folder
+def makeTree(root, width=8, depth=3, files=20):
+    folders = [root]
+    level = [root]
+    for d in range(depth):
+        new = []
+        for folder in level:
+            for w in range(width):
+                sub = os.path.join(folder, 'dir' + str(w))
+                os.mkdir(sub)
+                new.append(sub)
+        folders += new
+        level = new
+    for folder in folders:
+        for f in range(files):
+            ext = ['.txt', '.jpg', '.JPG', '.py'][f % 4]
+            open(os.path.join(folder, 'file' + str(f) + ext), 'w').close()
+    return len(folders)
+
+
+# count calls made to os level functions while running $func
+class CallCounter(object):
+
+    names = ['scandir', 'listdir', 'stat', 'lstat']
+
+    def __init__(self):
+        self.counts = dict((name, 0) for name in self.names)
+
+    def __enter__(self):
+        self._patches = []
+        for name in self.names:
+            orig = getattr(os, name)
+
+            def counted(*args, __name=name, __orig=orig, **kwargs):
+                self.counts[__name] += 1
+                return __orig(*args, **kwargs)
+
+            p = mock.patch('os.' + name, side_effect=counted)
+            p.start()
+            self._patches.append(p)
+        return self
+
+    def __exit__(self, *args):
+        for p in self._patches:
+            p.stop()
+
+
+def timeit(func, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        t = time.perf_counter() - start
+        if best is None or t < best:
+            best = t
+    return best
+
+
+# peak memory allocated while running $func
+def peakmemory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def report(name, seconds, counts=None):
+    line = '    {:<40s} {:8.4f} s'.format(name, seconds)
+    if counts:
+        line += '   ' + '  '.join('{}={}'.format(k, v) for k, v in counts.items() if v)
+    print(line)
+
+
+# synthetic paths like the ones a camera or a batch job leaves behind
+def makePaths(n):
+    paths = []
+    for i in range(n):
+        paths.append('/data/Run' + str(i % 37) + '/batch_' + str(i % 101) +
+                     '/IMG_' + str((i * 7919) % n).zfill(5) + ['.jpg', '.JPG', '.raw'][i % 3])
+    return paths
+
+
+## benchmarks
+
+
+def bench_listfilesext():
+    """ single pass listfilesext(rec=True) against listing folders then files """
+    root = tempfile.mkdtemp()
+    try:
+        numFolders = makeTree(root)
+        print('  {} folders'.format(numFolders))
+
+        # what listfilesext(rec=True) used to do: get all the folders, then
+        # read each of them again to get the files
+        def twoPass():
+            files = []
+            for folder in FnF.listsubdirrec(root):
+                files.extend(os.path.join(folder, f) for f in FnF.listfiles(folder))
+            return FnF.Filenames(files)
+
+        def onePass():
+            return FnF.listfilesext(root, rec=True)
+
+        assert sorted(twoPass().getstrlist()) == sorted(onePass().getstrlist())
+
+        for name, func in [('listsubdirrec + listfiles', twoPass),
+                           ('listfilesext(rec=True)', onePass)]:
+            with CallCounter() as counter:
+                func()
+            report(name, timeit(func), counter.counts)
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_iterfilesext():
+    """ time to first result and peak memory of iterfilesext against listfilesext """
+    root = tempfile.mkdtemp()
+    try:
+        makeTree(root, width=6, depth=4, files=10)
+
+        def first():
+            next(FnF.iterfilesext(root, rec=True))
+
+        def consume():
+            for f in FnF.iterfilesext(root, rec=True):
+                pass
+
+        def build():
+            FnF.listfilesext(root, rec=True)
+
+        report('iterfilesext first result', timeit(first))
+        report('listfilesext first result', timeit(build))
+        print('    peak memory: iterfilesext {} kB, listfilesext {} kB'.format(
+            peakmemory(consume) // 1024, peakmemory(build) // 1024))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_workers():
+    """ parallel listfilesext(rec=True) on a filesystem with 2 ms latency per folder read """
+    root = tempfile.mkdtemp()
+    try:
+        makeTree(root, width=5, depth=3, files=5)
+        scandir = os.scandir
+
+        # a network mount: every folder read waits on a round trip
+        def slowScandir(path):
+            time.sleep(0.002)
+            return scandir(path)
+
+        expected = sorted(FnF.listfilesext(root, rec=True).getstrlist())
+        with mock.patch('os.scandir', side_effect=slowScandir):
+            for workers in [None, 1, 2, 4, 8, 16]:
+                for ordered in [False, True]:
+                    if workers is None and ordered:
+                        continue
+
+                    def run():
+                        return FnF.listfilesext(root, rec=True, workers=workers, ordered=ordered)
+
+                    assert sorted(run().getstrlist()) == expected
+                    report('workers={} ordered={}'.format(workers, ordered), timeit(run, repeat=1))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_snapshotdiff():
+    """ Snapshot.diff on synthetic snapshots (1% of files added, removed, modified and renamed) """
+    for n in [200000, 400000, 800000]:
+        old = FnF.Snapshot()
+        new = FnF.Snapshot()
+        for i in range(n):
+            path = '/data/dir' + str(i % 1000) + '/file' + str(i)
+            state = (i, i, 1, i)
+            old._files[path] = state
+            if i % 100 == 0:
+                continue                                # removed
+            elif i % 100 == 1:
+                new._files[path + '.renamed'] = state   # renamed
+            elif i % 100 == 2:
+                new._files[path] = (i + 1, i, 1, i)     # modified
+            else:
+                new._files[path] = state
+            if i % 100 == 3:
+                new._files[path + '.new'] = (0, 0, 1, n + i)   # added
+
+        changes = old.diff(new)
+        assert len(changes.renamed) == len(changes.added) == n // 100
+        report('{} files'.format(n), timeit(lambda: old.diff(new), repeat=1))
+
+
+# the PathStr layout and __lt__ from before sortkey, kept to compare against:
+# a __dict__ per path, and once sorted three StrippedStr's (each with its own
+# StripRegex) compared number by number as floats
+oldDigitRE = re.compile(r'\d+')
+
+
+class OldPathStr(str):
+
+    class StrippedStr(object):
+        def __init__(self, s):
+            self.raw = s.lower()
+            self.__StripRE = StringQuartet.StripRegex(oldDigitRE)
+            self.__StripRE.Strip(self.raw)
+            self.Stripped = self.__StripRE.StrippedString
+            self.groups = self.__StripRE.groups
+            self.NumGroups = self.__StripRE.NumGroups
+            self.InsertLocations = self.__StripRE.InsertLocations
+
+    def __init__(self, *args):
+        self.sep = os.sep
+        self.stat = None
+        self._pathAsList = None
+        self._lessThanPrepped = False
+        self.__path, File = os.path.split(self)
+        self.__filename, self.__ext = os.path.splitext(File)
+        self.raw = self.__str__()
+
+    def __preplt__(self):
+        self.__StrippedParts = [OldPathStr.StrippedStr(self.__path),
+                                OldPathStr.StrippedStr(self.__filename),
+                                OldPathStr.StrippedStr(self.__ext)]
+        self._lessThanPrepped = True
+
+    def __lt__(self, other):
+        if not self._lessThanPrepped:
+            self.__preplt__()
+        if not other._lessThanPrepped:
+            other.__preplt__()
+        for S, O in zip(self.__StrippedParts, other.__StrippedParts):
+            if S.raw == O.raw:
+                continue
+            elif S.Stripped == O.Stripped:
+                for i, NumStr in enumerate(S.groups):
+                    if i < O.NumGroups:
+                        if S.InsertLocations[i] == O.InsertLocations[i]:
+                            sNum = float(NumStr)
+                            oNum = float(O.groups[i])
+                            if sNum == oNum:
+                                continue
+                            return sNum < oNum
+                        return S.InsertLocations[i] < O.InsertLocations[i]
+                    else:
+                        return True
+            else:
+                return S.raw < O.raw
+        return self.raw < other.raw
+
+
+def bench_sort():
+    """ Filenames.sort with PathStr.sortkey against sorting with the old and the new PathStr.__lt__ """
+    for n in [10000, 50000]:
+        paths = makePaths(n)
+
+        def oldpairwise():
+            sorted([OldPathStr(p) for p in paths])
+
+        def oldconstruct():
+            [OldPathStr(p) for p in paths]
+
+        def pairwise():
+            sorted(FnF.Filenames(paths)._list)
+
+        def keyed():
+            FnF.Filenames(paths).sort()
+
+        def construct():
+            FnF.Filenames(paths)
+
+        base = timeit(construct, repeat=1)
+        report('{} paths, old __lt__'.format(n), timeit(oldpairwise, repeat=1) - timeit(oldconstruct, repeat=1))
+        report('{} paths, __lt__'.format(n), timeit(pairwise, repeat=1) - base)
+        report('{} paths, sortkey'.format(n), timeit(keyed, repeat=1) - base)
+
+
+# bytes allocated per item while $func builds something out of $paths
+def bytesper(func, paths):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(paths)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / len(paths), result
+
+
+def bench_pathstrmemory():
+    """ memory per PathStr, after construction and after sorting (tracemalloc) """
+    n = 100000
+    paths = makePaths(n)
+    print('    plain str                                {:6.0f} bytes/path'.format(
+        bytesper(lambda l: [(p + ' ')[:-1] for p in l], paths)[0]))
+
+    perpath, files = bytesper(lambda l: [FnF.PathStr(p) for p in l], paths)
+    print('    PathStr                                  {:6.0f} bytes/path'.format(perpath))
+
+    def sortinplace(files):
+        files.sort(key=lambda p: p.sortkey)
+        return files
+    print('    + sorted                                 {:6.0f} bytes/path'.format(
+        bytesper(sortinplace, files)[0]))
+
+    # what a path took before __slots__ and sortkey
+    perpath, files = bytesper(lambda l: [OldPathStr(p) for p in l], paths)
+    print('    old PathStr                              {:6.0f} bytes/path'.format(perpath))
+    print('    + sorted                                 {:6.0f} bytes/path'.format(
+        bytesper(lambda l: l.sort() or l, files)[0]))
+
+    # the same, but from a listing (includes the str itself)
+    root = tempfile.mkdtemp()
+    try:
+        for i in range(20000):
+            open(os.path.join(root, 'IMG_' + str(i).zfill(5) + '.jpg'), 'w').close()
+        print('    str from a listing                       {:6.0f} bytes/path'.format(
+            bytesper(lambda r: os.listdir(r[0]), [root] * 20000)[0]))
+        print('    listfiles(full=False)                    {:6.0f} bytes/path'.format(
+            bytesper(lambda r: FnF.listfiles(r[0]), [root] * 20000)[0]))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_construction():
+    """ PathStr construction throughput against str, and the cost of the first .ext """
+    n = 200000
+    paths = [(p + ' ')[:-1] for p in makePaths(n)]
+
+    def rate(func, repeat=3):
+        return n / timeit(func, repeat) / 1e6
+
+    print('    str(p)                  {:6.2f} M/s'.format(rate(lambda: [str.__new__(str, p) for p in paths])))
+    print('    PathStr(p)              {:6.2f} M/s'.format(rate(lambda: [FnF.PathStr(p) for p in paths])))
+    print('    str.__new__(PathStr, p) {:6.2f} M/s'.format(rate(lambda: [str.__new__(FnF.PathStr, p) for p in paths])))
+    print('    Filenames(paths)        {:6.2f} M/s'.format(rate(lambda: FnF.Filenames(paths))))
+
+    # the first .ext splits the path, the next ones find it cached
+    files = [FnF.PathStr(p) for p in paths]
+    print('    first .ext              {:6.2f} M/s'.format(rate(lambda: [p.ext for p in files], repeat=1)))
+    print('    next .ext               {:6.2f} M/s'.format(rate(lambda: [p.ext for p in files])))
+
+
+def bench_columnar():
+    """ memory per path and sort time of ColumnarFilenames against Filenames """
+    root = tempfile.mkdtemp()
+    try:
+        deep = os.path.join(root, 'projects', 'experiment_2019', 'instrument_a', 'raw')
+        os.makedirs(deep)
+        makeTree(deep, width=4, depth=3, files=200)
+        listed = FnF.listfilesext(deep, rec=True).getstrlist()
+        for cls in [FnF.Filenames, FnF.ColumnarFilenames]:
+            perpath, files = bytesper(lambda l: cls(FnF.iterfilesext(deep, rec=True)), listed)
+            print('    {:<20s} listing {:6.0f} bytes/path'.format(cls.__name__, perpath))
+    finally:
+        shutil.rmtree(root)
+
+    paths = makePaths(200000)
+    for cls in [FnF.Filenames, FnF.ColumnarFilenames]:
+        perpath, files = bytesper(cls, paths)
+        print('    {:<20s} paths   {:6.0f} bytes/path'.format(cls.__name__, perpath))
+        report(cls.__name__ + '.sort', timeit(files.sort, repeat=1))
+
+
+def bench_setops():
+    """ reconciling two listings: list scans against indexed Filenames """
+    for n in [2000, 10000, 1000000]:
+        paths = makePaths(n)
+        old = FnF.Filenames(paths[:n * 9 // 10])
+        new = FnF.Filenames(paths[n // 10:])
+        if n <= 10000:
+            # what had to be done before: a linear 'in' for every path
+            report('{} paths, list scan'.format(n), timeit(lambda: [p for p in old if p not in new], repeat=1))
+        report('{} paths, difference'.format(n), timeit(lambda: old - new, repeat=1))
+        report('{} paths, build index'.format(n), timeit(lambda: FnF.Filenames(new, indexed=True), repeat=1))
+        indexed = FnF.Filenames(new, indexed=True)
+        report('{} paths, difference with indexed'.format(n), timeit(lambda: old - indexed, repeat=1))
+        assert len(old - new) == n // 10
+
+
+def bench_select():
+    """ Filenames.select against a scan of PathStr.ext and PathStr.path """
+    n = 1000000
+    files = FnF.Filenames(makePaths(n))
+
+    def scan():
+        return [p for p in files if p.ext.lower() == '.raw' and p.path == '/data/Run7/batch_3/']
+
+    def select():
+        return files.select(ext='.raw', folder='/data/Run7/batch_3/')
+
+    report('first scan (splits every path)', timeit(scan, repeat=1))
+    report('scan', timeit(scan))
+    report('first select (makes the groups)', timeit(select, repeat=1))
+    report('select', timeit(select))
+    report('select rec=True', timeit(lambda: files.select(ext='.jpg', folder='/data/Run7', rec=True)))
+    report('byfolder', timeit(lambda: files.byfolder('/data/Run7/batch_3/')))
+    report('byext (a third of the list)', timeit(lambda: files.byext('.raw')))
+    assert set(scan()) == set(select())
+
+
+def bench_prefetchstat():
+    """ Filenames.prefetchstat against serial isdir, local and with 1 ms latency per stat """
+    root = tempfile.mkdtemp()
+    try:
+        makeTree(root, width=4, depth=2, files=100)
+        paths = FnF.listfilesext(root, rec=True).getstrlist()
+        print('  {} files'.format(len(paths)))
+
+        def serial():
+            return [p.isdir for p in FnF.Filenames(paths)]
+
+        def prefetch(workers):
+            files = FnF.Filenames(paths)
+            files.prefetchstat(workers=workers)
+            return [p.isdir for p in files]
+
+        report('local, serial isdir', timeit(serial))
+        for workers in [1, 8]:
+            report('local, prefetchstat workers={}'.format(workers), timeit(lambda: prefetch(workers)))
+
+        # a network mount: every stat waits on a round trip
+        stat = os.stat
+
+        def slowStat(path, *args, **kwargs):
+            time.sleep(0.001)
+            return stat(path, *args, **kwargs)
+
+        paths = paths[:500]
+        with mock.patch('os.stat', side_effect=slowStat):
+            report('1 ms latency, serial isdir', timeit(serial, repeat=1))
+            for workers in [8, 32]:
+                report('1 ms latency, prefetchstat workers={}'.format(workers),
+                       timeit(lambda: prefetch(workers), repeat=1))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_statcache():
+    """ isdir on fresh PathStr's for the same paths, with and without the shared stat cache """
+    root = tempfile.mkdtemp()
+    try:
+        makeTree(root, width=4, depth=2, files=100)
+        paths = FnF.listfilesext(root, rec=True).getstrlist()
+
+        def isdirs():
+            return [FnF.PathStr(p).isdir for p in paths]
+
+        for maxsize in [0, 100000]:
+            FnF.statcache.maxsize = maxsize
+            FnF.statcache.clear()
+            isdirs()
+            with CallCounter() as counter:
+                isdirs()
+            report('maxsize={}'.format(maxsize), timeit(isdirs), counter.counts)
+        print('    hits={} misses={}'.format(FnF.statcache.hits, FnF.statcache.misses))
+    finally:
+        FnF.statcache.maxsize = 0
+        FnF.statcache.clear()
+        shutil.rmtree(root)
+
+
+def bench_filter():
+    """ the compiled inc/dinc/ext filter against the nested loops it replaced, with many patterns """
+
+    # what _ScanFilter did before: a python loop over every pattern
+    class LoopFilter(object):
+        def __init__(self, inc, dinc, ext):
+            self.inc, self.dinc, self.ext = inc, dinc, [e.lower() for e in ext]
+
+        def prune(self, folder):
+            OK = False
+            for dincStr in self.dinc:
+                if dincStr in folder:
+                    OK = True
+            return OK
+
+        def fileok(self, File):
+            OK = True
+            if self.ext:
+                _, fext = os.path.splitext(File)
+                if fext.lower() not in self.ext:
+                    OK = False
+            sepFile = os.sep + File
+            for incStr in self.inc:
+                if incStr not in sepFile:
+                    OK = False
+            for dincStr in self.dinc:
+                if dincStr in sepFile:
+                    OK = False
+            return OK
+
+    paths = makePaths(200000)
+    names = [os.path.basename(p) for p in paths]
+    for numPatterns in [2, 10, 50]:
+        dinc = ['/.', '/_'] + ['exclude' + str(i) for i in range(numPatterns - 2)]
+        ext = ['.jpg', '.png', '.tif'] + ['.e' + str(i) for i in range(numPatterns)]
+        inc = ['IMG']
+        loop = LoopFilter(inc, dinc, ext)
+        compiled = FnF._ScanFilter({'inc': inc, 'dinc': dinc, 'ext': ext, 'system': True})
+
+        for name, filt in [('loops', loop), ('compiled', compiled)]:
+            assert [filt.fileok(n) for n in names[:1000]] == [loop.fileok(n) for n in names[:1000]]
+            assert [filt.prune(p) for p in paths[:1000]] == [loop.prune(p) for p in paths[:1000]]
+            t = timeit(lambda: [filt.prune(p) for p in paths], repeat=1) + \
+                timeit(lambda: [filt.fileok(n) for n in names], repeat=1)
+            report('{} patterns, {}'.format(numPatterns, name), t)
+
+
+def bench_glob():
+    """ listglob against listfilesext(rec=True) and filtering the result with fnmatch """
+    import fnmatch
+    import glob as globmodule
+    root = tempfile.mkdtemp()
+    try:
+        makeTree(root, width=6, depth=4, files=10)
+        for pattern in ['dir1/*/dir3/*.jpg', '**/dir2/*/dir5/*.py', '**/*.txt']:
+            full = os.path.join(root, pattern)
+
+            # what we did before: list everything, then filter (fnmatch's * also
+            # matches separators, so this keeps a few more paths than the pattern)
+            def postfilter():
+                return [p for p in FnF.listfilesext(root, rec=True)
+                        if fnmatch.fnmatchcase(p, full.replace('**/', '*'))]
+
+            def glob():
+                return FnF.listglob(pattern, root)
+
+            matches = sorted(glob().getstrlist())
+            assert matches == sorted(globmodule.glob(full, recursive=True))
+            assert set(matches) <= set(postfilter())
+            for name, func in [('list + fnmatch', postfilter), ('listglob', glob)]:
+                with CallCounter() as counter:
+                    func()
+                report('{} {}'.format(pattern, name), timeit(func, repeat=1), counter.counts)
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_array():
+    """ FilenamesArray against python loops over PathStr properties (1M paths) """
+    import collections
+    n = 1000000
+    files = FnF.Filenames(makePaths(n))
+
+    def loopExtcounts():
+        return collections.Counter(p.ext.lower() for p in files)
+
+    def loopDepths():
+        return collections.Counter(p.count(os.sep) for p in files)
+
+    def loopFilter():
+        return [p for p in files if p.startswith('/data/Run1') and p.endswith('.raw')]
+
+    report('toarray', timeit(files.toarray, repeat=1))
+    arr = files.toarray()
+
+    # the columns are worked out once and then shared by every query
+    def columns():
+        arr._cache.clear()
+        arr.exts
+        arr.depths
+    report('exts and depths columns', timeit(columns, repeat=1))
+
+    def arrFilter():
+        return arr.filter(arr.startswith('/data/Run1') & arr.endswith('.raw'))
+
+    assert dict(loopExtcounts()) == arr.extcounts()
+    assert dict(loopDepths()) == arr.depthcounts()
+    assert loopFilter() == arrFilter().getstrlist()
+    # the query alone (columns already made) and everything from the Filenames
+    # on: toarray, the columns the query needs and the query
+    for name, loop, vectorised, endtoend in [
+            ('ext histogram', loopExtcounts, arr.extcounts, lambda: files.toarray().extcounts()),
+            ('depth histogram', loopDepths, arr.depthcounts, lambda: files.toarray().depthcounts()),
+            ('prefix and suffix filter', loopFilter, arrFilter,
+             lambda: files.toarray().filter(arr.startswith('/data/Run1') & arr.endswith('.raw')))]:
+        looptime = timeit(loop, repeat=1)
+        report(name + ', loop', looptime)
+        for label, func in [('query', vectorised), ('from toarray', endtoend)]:
+            t = timeit(func, repeat=1)
+            print('    {:<40s} {:8.4f} s  {:5.1f}x'.format(name + ', ' + label, t, looptime / t))
+
+
+def bench_humansort():
+    """ humansort against the lambda version it replaced, memoized keys and the first page only """
+    import re
+    n = 500000
+    paths = makePaths(n)
+
+    def oldhumansort(l):
+        convert = lambda text: int(text) if text.isdigit() else text.lower()
+        alphanum_key = lambda key: [convert(c) for c in re.split('([0-9]+)', key)]
+        return sorted(l, key=alphanum_key)
+
+    assert oldhumansort(paths) == FnF.humansort(paths)
+    report('old humansort', timeit(lambda: oldhumansort(paths), repeat=1))
+    report('humansort', timeit(lambda: FnF.humansort(paths), repeat=1))
+    FnF.humansort(paths, memo=True)
+    report('humansort, memo=True (keys cached)', timeit(lambda: FnF.humansort(paths, memo=True), repeat=1))
+    assert FnF.humansmallest(paths, 100) == FnF.humansort(paths)[:100]
+    report('humansmallest(100)', timeit(lambda: FnF.humansmallest(paths, 100), repeat=1))
+
+
+def bench_sortedwalk():
+    """ listfilesext(sort=...) against listing everything and then sorting """
+    root = tempfile.mkdtemp()
+    try:
+        makeTree(root, width=6, depth=4, files=10)
+
+        def listsort():
+            files = FnF.listfilesext(root, rec=True)
+            files.sort()
+            return files
+
+        def sortedwalk():
+            return FnF.listfilesext(root, rec=True, sort='natural')
+
+        def first():
+            next(FnF.iterfilesext(root, rec=True, sort='natural'))
+
+        def consume():
+            for f in FnF.iterfilesext(root, rec=True, sort='natural'):
+                pass
+
+        assert listsort().getstrlist() == sortedwalk().getstrlist()
+        report('listfilesext + sort', timeit(listsort, repeat=1))
+        report("listfilesext(sort='natural')", timeit(sortedwalk, repeat=1))
+        report("iterfilesext(sort='natural') first file", timeit(first, repeat=1))
+        print('    peak memory: list + sort {} kB, sorted iterfilesext {} kB'.format(
+            peakmemory(listsort) // 1024, peakmemory(consume) // 1024))
+    finally:
+        shutil.rmtree(root)
+
+
+def bench_parallelsort():
+    """ Filenames.sort(workers=n) against the serial sort, by number of processes """
+    n = 1000000
+    files = FnF.Filenames(makePaths(n))
+    expected = FnF.Filenames(files._list)
+    expected.sort()
+    report('{} paths, serial'.format(n), timeit(lambda: FnF.Filenames(files._list).sort(), repeat=1))
+    workers = 1
+    while workers <= max(os.cpu_count(), 4):
+        def parallel():
+            copy = FnF.Filenames(files._list)
+            copy.sort(workers=workers)
+            return copy
+
+        assert parallel().getstrlist() == expected.getstrlist()
+        report('{} paths, workers={} ({} cores)'.format(n, workers, os.cpu_count()),
+               timeit(parallel, repeat=1))
+        workers *= 2
+
+
+def bench_externalsort():
+    """ externalsort with a memory cap against sorting a Filenames in memory """
+    n = 1000000
+    paths = makePaths(n)
+
+    def inmemory():
+        files = FnF.Filenames(iter(paths))
+        files.sort()
+        return files
+
+    def external(maxmemory):
+        return lambda: sum(1 for p in FnF.externalsort(iter(paths), maxmemory=maxmemory))
+
+    report('{} paths, Filenames.sort'.format(n), timeit(inmemory, repeat=1))
+    print('    peak memory {} MB'.format(peakmemory(inmemory) // 2**20))
+    for maxmemory in [2**26, 2**24]:
+        report('{} paths, externalsort({} MB)'.format(n, maxmemory // 2**20), timeit(external(maxmemory), repeat=1))
+        print('    peak memory {} MB'.format(peakmemory(external(maxmemory)) // 2**20))
+
+
+def bench_text():
+    """ str(Filenames) against the old loop that added to a str, and export """
+    import io
+    for n in [10000, 100000, 1000000]:
+        files = FnF.Filenames(makePaths(n))
+
+        def oldstr():
+            s = ''
+            for v in files._list:
+                s = s + v + ',\n'
+            return s[:-2]
+
+        if n <= 100000:
+            assert oldstr() == str(files)
+            report('{} paths, old __str__'.format(n), timeit(oldstr, repeat=1))
+        report('{} paths, __str__'.format(n), timeit(lambda: str(files), repeat=1))
+        report('{} paths, export'.format(n), timeit(lambda: files.export(io.StringIO()), repeat=1))
+    print('    peak memory of 1M paths: __str__ {} MB, export to a file {} MB'.format(
+        peakmemory(lambda: str(files)) // 2**20,
+        peakmemory(lambda: files.export(os.devnull)) // 2**20))
+
+
+BENCHMARKS = [
+    bench_listfilesext,
+    bench_iterfilesext,
+    bench_workers,
+    bench_snapshotdiff,
+    bench_sort,
+    bench_pathstrmemory,
+    bench_construction,
+    bench_columnar,
+    bench_setops,
+    bench_select,
+    bench_prefetchstat,
+    bench_statcache,
+    bench_filter,
+    bench_glob,
+    bench_array,
+    bench_humansort,
+    bench_sortedwalk,
+    bench_parallelsort,
+    bench_externalsort,
+    bench_text,
+]
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:]
+    for bench in BENCHMARKS:
+        name = bench.__name__[len('bench_'):]
+        if names and name not in names:
+            continue
+        print(name + ': ' + bench.__doc__.strip())
+        bench()
@@ -1,13 +1,760 @@
+import os
+import re
+import sys
+import asyncio
+import contextlib
+import shutil
+import tempfile
+import time
 import unittest
+from unittest import mock
+
+import FnF
+
+
+# the folders os.scandir is called on are added to the yielded list while in
+# the with block
+@contextlib.contextmanager
+def countingScandir():
+    opened = []
+    scandir = os.scandir
+
+    def counting(path):
+        opened.append(path)
+        return scandir(path)
+
+    with mock.patch('os.scandir', side_effect=counting):
+        yield opened
+
+
+# build a directory tree from a list of relative paths, paths ending in a
+# slash are created as folders, everything else as (empty) files
+def makeTree(root, paths):
+    for p in paths:
+        full = os.path.join(root, p)
+        if p.endswith('/'):
+            os.makedirs(full, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, 'w') as f:
+                f.write(p)
+
 
 class TestFnF(unittest.TestCase):
- 
+
     def setUp(self):
         pass
- 
+
     def test_should_pass(self):
         self.assertEqual(True, True)
 
 
+class TestText(unittest.TestCase):
+
+    def test_str_and_repr(self):
+        files = FnF.Filenames(['a.txt', 'b/c.jpg'])
+        self.assertEqual(str(files), 'a.txt,\nb/c.jpg')
+        self.assertEqual(repr(files), 'Filenames([\na.txt,\nb/c.jpg\n])')
+        self.assertEqual(str(FnF.Filenames()), '')
+        self.assertEqual(repr(FnF.Filenames()), 'Filenames([\n\n])')
+
+    def test_export(self):
+        import io
+        import json
+        names = ['a.txt', 'b/c.jpg', 'd\ne', 'f\udcff']
+        files = FnF.Filenames(names)
+        for delimiter in ['\n', '\0']:
+            f = io.StringIO()
+            self.assertEqual(files.export(f, delimiter, chunksize=3), 4)
+            self.assertEqual(f.getvalue(), delimiter.join(names) + delimiter)
+        f = io.StringIO()
+        FnF.ColumnarFilenames(names).export(f, 'jsonl')
+        self.assertEqual([json.loads(line) for line in f.getvalue().splitlines()], names)
+        self.assertEqual(FnF.Filenames().export(io.StringIO()), 0)
+        self.assertRaises(TypeError, files.export, io.StringIO(), ',')
+
+
+class TestSorting(unittest.TestCase):
+
+    def test_sort(self):
+        names = ['photos/img10.jpg', 'photos/img2.jpg', 'photos/IMG1.jpg', 'photos/img1.png',
+                 'photos/img01.jpg', 'photo/img3.jpg', 'photos 2/img3.jpg', 'photos/photo (2).jpg',
+                 'photos/photo (10).jpg', 'photos/photo10.jpg', 'x.txt']
+        expected = ['x.txt', 'photo/img3.jpg', 'photos/IMG1.jpg', 'photos/img01.jpg', 'photos/img1.png',
+                    'photos/img2.jpg', 'photos/img10.jpg', 'photos/photo (2).jpg', 'photos/photo (10).jpg',
+                    'photos/photo10.jpg', 'photos 2/img3.jpg']
+        files = FnF.Filenames(names)
+        files.sort()
+        self.assertEqual(files.getstrlist(), expected)
+
+        files.sort(reverse=True)
+        self.assertEqual(files.getstrlist(), expected[::-1])
+
+        # the comparison operators give the same order
+        self.assertEqual([str(p) for p in sorted(FnF.Filenames(names))], expected)
+        self.assertTrue(FnF.PathStr('img2.jpg') < 'img10.jpg')
+        self.assertTrue(FnF.PathStr('img10.jpg') >= FnF.PathStr('img2.jpg'))
+
+    def test_pathstr_has_no_instance_dict(self):
+        p = FnF.PathStr('a/b.txt')
+        self.assertFalse(hasattr(p, '__dict__'))
+        self.assertEqual((p.raw, p.path, p.filename, p.ext), ('a/b.txt', 'a/', 'b', '.txt'))
+        self.assertIs(type(p.raw), str)
+
+    def test_pathstr_splits_lazily(self):
+        p = FnF.PathStr('/a/b/c.tar.gz')
+        self.assertFalse(hasattr(p, '_parts'))
+        self.assertIsNone(p.stat)
+        self.assertEqual(p.ext, '.gz')
+        self.assertIs(p.filename, p.filename)
+        self.assertEqual(p.path, '/a/b/')
+        q = FnF.PathStr(['', 'a', 'b', ''])
+        self.assertEqual((q.raw, q.getPathAsList()), ('/a/b/', ['a', 'b']))
+        self.assertTrue(q.ispathstyle)
+
+    def test_sortkey_numbers_are_exact(self):
+        # these are the same number as floats
+        a = FnF.PathStr('a/f12345678901234567890.txt')
+        b = FnF.PathStr('a/f12345678901234567891.txt')
+        self.assertLess(a.sortkey, b.sortkey)
+        self.assertEqual(FnF.PathStr('File10.TXT').sortkey[:3], FnF.PathStr('file010.txt').sortkey[:3])
+
+    def test_sortkey_is_consistent(self):
+        # the old pairwise __lt__ said both 'file2.txt' < 'file.txt' and 'file.txt' < 'file2.txt'
+        files = FnF.Filenames(['file2.txt', 'file.txt'])
+        files.sort()
+        self.assertEqual(files.getstrlist(), ['file.txt', 'file2.txt'])
+        files = FnF.Filenames(['file.txt', 'file2.txt'])
+        files.sort()
+        self.assertEqual(files.getstrlist(), ['file.txt', 'file2.txt'])
+
+    def test_parallel_sort(self):
+        names = ['photos/img10.jpg', 'photos/img2.jpg', 'photos/IMG1.jpg', 'photos/img01.jpg',
+                 'photos 2/img3.jpg', 'photo/img3.jpg', 'a/f12345678901234567891.txt', 'a/f' + '9' * 300,
+                 'a/f12345678901234567890.txt', 'a/f' + '1' * 300, 'x.txt', 'x', 'x.', 'x/y', 'b\udcff.txt',
+                 'b\xe9.txt', 'b\u20ac.txt', 'c/1/2', 'c/1 2', 'c/01', 'x.txt']
+        # the byte keys sort the same way as the sortkey tuples
+        keys = sorted(names, key=FnF._naturalbyteskey)
+        self.assertEqual(keys, sorted(names, key=lambda p: FnF.PathStr(p).sortkey))
+
+        expected = FnF.Filenames(names * 20)
+        expected.sort()
+        with mock.patch.object(FnF, '_PARALLEL_SORT_MIN', 0):
+            for cls in [FnF.Filenames, FnF.ColumnarFilenames]:
+                files = cls(names * 20)
+                files.sort(workers=3)
+                self.assertEqual(files.getstrlist(), expected.getstrlist())
+                files.sort(reverse=True, workers=2)
+                self.assertEqual(files.getstrlist(), expected.getstrlist()[::-1])
+
+
+class TestHumansort(unittest.TestCase):
+
+    names = ['file10.txt', 'File2.txt', 'file1.txt', 'file (3).f', 'file.f', 'img007', 'img7a', 'img07',
+             'a1b2', 'a1b10', 'A1B3', '', '10', '9']
+
+    # the key humansort used before
+    @staticmethod
+    def oldkey(key):
+        convert = lambda text: int(text) if text.isdigit() else text.lower()
+        return [convert(c) for c in re.split('([0-9]+)', key)]
+
+    def test_humansort(self):
+        expected = sorted(self.names, key=self.oldkey)
+        self.assertEqual(FnF.humansort(self.names), expected)
+        self.assertEqual(FnF.humansort(self.names, reverse=True, memo=True),
+                         sorted(self.names, key=self.oldkey, reverse=True))
+
+        names = list(self.names)
+        self.assertIsNone(FnF.humansort(names, inplace=True, memo=True))
+        self.assertEqual(names, expected)
+
+        for cls in [FnF.Filenames, FnF.ColumnarFilenames]:
+            files = cls(self.names)
+            FnF.humansort(files, inplace=True)
+            self.assertEqual(files.getstrlist(), expected)
+        FnF.humansort(files, inplace=True, reverse=True)
+        self.assertEqual(files.getstrlist(), sorted(self.names, key=self.oldkey, reverse=True))
+
+    def test_smallest_and_largest(self):
+        expected = FnF.humansort(self.names)
+        self.assertEqual(FnF.humansmallest(self.names, 4), expected[:4])
+        self.assertEqual(FnF.humanlargest(self.names, 3, memo=True), FnF.humansort(self.names, reverse=True)[:3])
+        self.assertEqual(FnF.humansmallest(self.names, 100), expected)
+
+
+class TestExternalSort(unittest.TestCase):
+
+    names = (TestHumansort.names + ['photos/img10.jpg', 'photos/IMG1.jpg', 'photos/img01.jpg', 'a\nb',
+                                    'b\udcff.txt', 'photos 2/img3.jpg']) * 30
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_same_order_as_in_memory(self):
+        files = FnF.Filenames(self.names)
+        files.sort()
+        # small enough runs (and merges) that several passes are needed
+        with mock.patch.object(FnF, '_MERGEFANIN', 3):
+            for order, expected in [('natural', files.getstrlist()), ('human', FnF.humansort(self.names))]:
+                paths = FnF.externalsort(iter(self.names), order, maxmemory=5000, tmpdir=self.tmpdir)
+                self.assertEqual(list(paths), expected)
+                self.assertEqual(os.listdir(self.tmpdir), [])
+        self.assertEqual(list(FnF.externalsort(self.names)), files.getstrlist())
+        self.assertRaises(TypeError, FnF.externalsort, self.names, 'size')
+
+    def test_out_and_folder_source(self):
+        root = os.path.join(self.tmpdir, 'tree')
+        makeTree(root, ['b10.txt', 'b9.txt', 'sub/a.txt', 'sub/b.jpg'])
+        out = os.path.join(self.tmpdir, 'sorted.txt')
+        n = FnF.externalsort(root, out=out, maxmemory=100, rec=True, ext=['.txt'])
+        self.assertEqual(n, 3)
+        with open(out) as f:
+            self.assertEqual(f.read().splitlines(),
+                             [os.path.join(root, p) for p in ['b9.txt', 'b10.txt', 'sub/a.txt']])
+
+
+class TestColumnarFilenames(unittest.TestCase):
+
+    names = ['/data/run2/img10.jpg', '/data/run2/img2.jpg', '/data/run10/IMG1.jpg', 'x.txt',
+             '/data//run2/img3.jpg', '/img1.png', 'data/', '/data/run2/img1.jpg']
+
+    def test_matches_filenames(self):
+        files = FnF.Filenames(self.names)
+        cols = FnF.ColumnarFilenames(self.names)
+        self.assertEqual(len(cols._dirs), 6)
+        self.assertEqual(cols.getstrlist(), self.names)
+        self.assertEqual(list(cols), self.names)
+        self.assertIsInstance(cols[0], FnF.PathStr)
+        self.assertEqual(cols[-1], files[-1])
+        self.assertEqual(str(cols), str(files))
+        self.assertEqual(cols[1:6:2].getstrlist(), files[1:6:2].getstrlist())
+
+        files.sort()
+        cols.sort()
+        self.assertEqual(cols.getstrlist(), files.getstrlist())
+        files.sort(reverse=True)
+        cols.sort(reverse=True)
+        self.assertEqual(cols.getstrlist(), files.getstrlist())
+
+    def test_mutation(self):
+        cols = FnF.ColumnarFilenames(self.names)
+        cols[0] = '/other/a.txt'
+        cols.insert(1, FnF.PathStr('b.txt'))
+        cols.append('/data/run2/new.jpg')
+        del cols[2]
+        cols[:2] = ['/c.txt']
+        self.assertEqual(cols.getstrlist(), ['/c.txt'] + self.names[2:] + ['/data/run2/new.jpg'])
+        self.assertIn('/data/run2/new.jpg', cols)
+        self.assertNotIn('/data/run2/new.png', cols)
+        with self.assertRaises(TypeError):
+            cols.append(1)
+        # a failed extend leaves the columns as they were
+        before = cols.getstrlist()
+        with self.assertRaises(TypeError):
+            cols.extend(['/d/\u00e9.txt', 1])
+        self.assertEqual(cols.getstrlist(), before)
+        self.assertEqual(cols[-1], before[-1])
+
+
+class TestIndexedFilenames(unittest.TestCase):
+
+    def test_hash_and_eq(self):
+        p = FnF.PathStr('a/b.txt')
+        self.assertEqual(hash(p), hash('a/b.txt'))
+        self.assertEqual(p, 'a/b.txt')
+        self.assertNotEqual(p, 'a/b.TXT')
+        with self.assertRaises(NotImplementedError):
+            p == 1
+
+    def test_index_follows_mutation(self):
+        files = FnF.Filenames(['a', 'b', 'a'], indexed=True)
+        self.assertIn('a', files)
+        self.assertIn(FnF.PathStr('b'), files)
+        self.assertNotIn('c', files)
+        self.assertNotIn(1, files)
+
+        del files[0]
+        self.assertIn('a', files)
+        files.remove('a')
+        self.assertNotIn('a', files)
+        files.append('c')
+        files[0] = 'd'
+        files[1:] = ['e', 'f']
+        self.assertEqual(files.getstrlist(), ['d', 'e', 'f'])
+        self.assertEqual(files._index, {'d': 1, 'e': 1, 'f': 1})
+        self.assertIsNotNone(files[1:]._index)
+
+    def test_set_operations(self):
+        a = FnF.Filenames(['x/1', 'x/2', 'x/3', 'x/2'])
+        a[0]._getStat()
+        b = FnF.Filenames(['x/3', 'x/4', 'x/1'], indexed=True)
+        self.assertEqual((a | b).getstrlist(), ['x/1', 'x/2', 'x/3', 'x/4'])
+        self.assertEqual((a & b).getstrlist(), ['x/1', 'x/3'])
+        self.assertEqual((a - b).getstrlist(), ['x/2'])
+        self.assertEqual(a.difference(['x/2']).getstrlist(), ['x/1', 'x/3'])
+        # the PathStr's (and what they have cached) are kept
+        self.assertIs((a & b)[0], a[0])
+        self.assertIn('x/4', a | b)
+
+
+class TestSelect(unittest.TestCase):
+
+    names = ['a/1.jpg', 'a/2.JPG', 'a/3.txt', 'a/b/4.jpg', 'a/bc/5.jpg', 'c/6.jpg', '7.jpg']
+
+    def test_select(self):
+        for files in [FnF.Filenames(self.names), FnF.ColumnarFilenames(self.names)]:
+            self.assertEqual(sorted(files.byext('.jpg').getstrlist()),
+                             ['7.jpg', 'a/1.jpg', 'a/2.JPG', 'a/b/4.jpg', 'a/bc/5.jpg', 'c/6.jpg'])
+            self.assertEqual(sorted(files.byfolder('a').getstrlist()), ['a/1.jpg', 'a/2.JPG', 'a/3.txt'])
+            self.assertEqual(files.byfolder('a/b/').getstrlist(), ['a/b/4.jpg'])
+            self.assertEqual(files.byfolder('').getstrlist(), ['7.jpg'])
+            self.assertEqual(sorted(files.select(ext=['.JPG'], folder='a', rec=True).getstrlist()),
+                             ['a/1.jpg', 'a/2.JPG', 'a/b/4.jpg', 'a/bc/5.jpg'])
+            self.assertEqual(files.select(ext='.txt', folder='a').getstrlist(), ['a/3.txt'])
+
+    def test_groups_follow_mutation(self):
+        files = FnF.Filenames(self.names)
+        self.assertEqual(len(files.byext('.txt')), 1)
+        files.append('a/8.TXT')
+        files.extend(['d/9.txt', 'd/9.txt'])
+        del files[2]
+        files[0] = 'a/1.txt'
+        files.remove('d/9.txt')
+        self.assertEqual(sorted(files.byext('.txt').getstrlist()), ['a/1.txt', 'a/8.TXT', 'd/9.txt'])
+        self.assertEqual(len(files.byext('.jpg')), 5)
+        files[:] = []
+        self.assertEqual(files._groups, ({}, {}))
+
+
+class TestStatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        makeTree(self.root, ['a.txt', 'sub/b.txt'])
+        FnF.statcache.maxsize = 100
+        FnF.statcache.clear()
+
+    def tearDown(self):
+        FnF.statcache.maxsize = 0
+        FnF.statcache.ttl = None
+        FnF.statcache.clear()
+        shutil.rmtree(self.root)
+
+    def test_shared_between_pathstrs(self):
+        path = os.path.join(self.root, 'a.txt')
+        self.assertTrue(FnF.PathStr(path).exists)
+        with mock.patch('os.stat', side_effect=AssertionError('stat called')):
+            self.assertFalse(FnF.PathStr(path).isdir)
+        self.assertEqual((FnF.statcache.hits, FnF.statcache.misses), (1, 1))
+
+    def test_off_counts_nothing(self):
+        FnF.statcache.maxsize = 0
+        FnF.statcache.ttl = 5
+        path = os.path.join(self.root, 'a.txt')
+        self.assertTrue(FnF.PathStr(path).exists)
+        self.assertNotEqual(FnF.statcache.get(path), 'no_exist')
+        list(FnF.iterglob(os.path.join(self.root, 'sub', 'b.txt')))
+        FnF.DirIndex().readfolder(self.root)
+        self.assertEqual((len(FnF.statcache), FnF.statcache.hits, FnF.statcache.misses), (0, 0, 0))
+
+    def test_ttl_and_invalidate(self):
+        missing = FnF.PathStr(os.path.join(self.root, 'sub', 'c.txt'))
+        self.assertFalse(missing.exists)
+        makeTree(self.root, ['sub/c.txt'])
+        self.assertFalse(missing.exists)
+        FnF.statcache.invalidatetree(os.path.join(self.root, 'sub'))
+        self.assertTrue(missing.exists)
+
+        FnF.statcache.ttl = 10
+        os.remove(missing)
+        self.assertTrue(missing.exists)
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 11):
+            self.assertFalse(missing.exists)
+
+        FnF.statcache.invalidate(missing)
+        self.assertEqual(len(FnF.statcache), 0)
+
+    def test_listed_pathstrs_use_the_cache(self):
+        files = FnF.listfilesext(self.root, rec=True)
+        FnF.statcache.ttl = 10
+        self.assertTrue(all(f.exists for f in files))
+        for f in files:
+            os.remove(f)
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 11):
+            self.assertFalse(any(f.exists for f in files))
+
+        files = FnF.listsubdir(self.root)
+        FnF.statcache.invalidatetree(self.root)
+        self.assertTrue(files[0].isdir)
+        shutil.rmtree(os.path.join(self.root, 'sub'))
+        FnF.statcache.invalidate(os.path.join(self.root, 'sub'))
+        self.assertFalse(files[0].isdir)
+
+    def test_prefetchstat(self):
+        os.symlink(os.path.join(self.root, 'sub'), os.path.join(self.root, 'link'))
+        dirs = FnF.listsubdir(self.root, full=True)
+        dirs.prefetchstat(lstat=True)
+        # isdir doesn't replace the lstat with a stat that follows the link
+        self.assertEqual([d.raw for d in dirs if d.isdir], [os.path.join(self.root, 'sub', '')])
+
+        cols = FnF.ColumnarFilenames(FnF.listfilesext(self.root, rec=True))
+        cols.prefetchstat(workers=2)
+        with mock.patch('os.stat', side_effect=AssertionError('stat called')):
+            self.assertTrue(all(f.exists for f in cols))
+        FnF.statcache.maxsize = 0
+        self.assertRaises(RuntimeError, cols.prefetchstat)
+
+    def test_size_bound(self):
+        FnF.statcache.maxsize = 2
+        for name in ['a.txt', 'sub', 'sub/b.txt']:
+            FnF.PathStr(os.path.join(self.root, name))._getStat()
+        self.assertEqual([k[0] for k in FnF.statcache._cache],
+                         [os.path.join(self.root, name) for name in ['sub', 'sub/b.txt']])
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'needs numpy')
+class TestFilenamesArray(unittest.TestCase):
+
+    names = ['/a/b/c.JPG', 'x.tar.gz', '/a/.hidden', '/a/..x.Y', 'd/', '/a/b/e.\u00c9XT', 'plain']
+
+    def test_columns(self):
+        arr = FnF.Filenames(self.names).toarray()
+        self.assertEqual(arr.exts.tolist(), [os.path.splitext(n)[1].lower() for n in self.names])
+        self.assertEqual(arr.basenames.tolist(), [os.path.basename(n) for n in self.names])
+        self.assertEqual(arr.folders.tolist(), ['/a/b/', '', '/a/', '/a/', 'd/', '/a/b/', ''])
+        self.assertEqual(arr.depths.tolist(), [n.count(os.sep) for n in self.names])
+
+    def test_folder_paths(self):
+        # the longest path ends with a separator (as in a listsubdirrec)
+        for names in [['a/', 'bb'], ['d/'], ['/a/b/', '/a/.x', 'y.TXT']]:
+            arr = FnF.Filenames(names).toarray()
+            self.assertEqual(arr.exts.tolist(), [os.path.splitext(n)[1].lower() for n in names])
+            self.assertEqual(arr.basenames.tolist(), [os.path.basename(n) for n in names])
+            self.assertEqual(sum(arr.extcounts().values()), len(names))
+            self.assertEqual(arr.counts('ext'), arr.extcounts())
+            self.assertFalse(arr.hasext('.x').any())
+
+    def test_masks_and_groups(self):
+        files = FnF.Filenames(self.names)
+        arr = files.toarray()
+        self.assertEqual(arr.filter(arr.startswith('/a/') & ~arr.contains('.h')).getstrlist(),
+                         ['/a/b/c.JPG', '/a/..x.Y', '/a/b/e.\u00c9XT'])
+        self.assertEqual(arr.filter(arr.endswith(('.gz', 'n'))).getstrlist(), ['x.tar.gz', '/a/.hidden', 'plain'])
+        self.assertIs(arr.filter(arr.hasext('.jpg'))[0], files[0])
+        self.assertEqual(arr.extcounts(), {'': 3, '.gz': 1, '.jpg': 1, '.y': 1, '.\u00e9xt': 1})
+        self.assertEqual(arr.depthcounts(), {0: 2, 1: 1, 2: 2, 3: 2})
+        self.assertEqual(arr.groupby('folder')['/a/'].getstrlist(), ['/a/.hidden', '/a/..x.Y'])
+        self.assertEqual(len(FnF.Filenames().toarray().filter(numpy.zeros(0, bool))), 0)
+
+
+class TestListing(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        makeTree(self.root, [
+            'a.txt',
+            'b.JPG',
+            '.hidden',
+            'sub1/c.txt',
+            'sub1/deep/d.jpg',
+            'sub2/',
+            '.git/objects/e.txt',
+            '_build/f.txt',
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_listfiles(self):
+        files = FnF.listfiles(self.root)
+        self.assertEqual(sorted(files.getstrlist()), ['.hidden', 'a.txt', 'b.JPG'])
+
+        files = FnF.listfiles(self.root, full=True)
+        self.assertEqual(sorted(files.getstrlist()),
+                         [os.path.join(self.root, f) for f in ['.hidden', 'a.txt', 'b.JPG']])
+
+    def test_listsubdir(self):
+        dirs = FnF.listsubdir(self.root)
+        self.assertEqual(sorted(dirs.getstrlist()), ['.git/', '_build/', 'sub1/', 'sub2/'])
+
+        dirs = FnF.listsubdir(self.root, full=True)
+        self.assertIn(os.path.join(self.root, 'sub1', ''), dirs.getstrlist())
+
+    def test_listing_seeds_stat(self):
+        files = FnF.listfiles(self.root)
+        dirs = FnF.listsubdir(self.root)
+        # the file types are already known from the directory listing
+        with mock.patch('os.stat', side_effect=AssertionError('stat called')):
+            self.assertTrue(all(f.exists for f in files))
+            self.assertFalse(any(f.isdir for f in files))
+            self.assertTrue(all(d.isdir for d in dirs))
+
+        # relative PathStr's still stat the listed file rather than one in the cwd
+        files[0]._getStat()
+        self.assertEqual(files[0].stat.st_size, len(files[0]))
+
+    def test_pickle_and_copy(self):
+        import copy
+        import pickle
+        files = FnF.listfilesext(self.root, rec=True)
+        files[0].isdir
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(files, protocol))
+            self.assertEqual(loaded.getstrlist(), files.getstrlist())
+            self.assertIs(type(loaded[0]), FnF.PathStr)
+            self.assertEqual(loaded[0].sortkey, files[0].sortkey)
+        copied = copy.deepcopy(files)
+        self.assertEqual(copied.getstrlist(), files.getstrlist())
+        self.assertTrue(all(f.exists for f in copied))
+
+    def test_prefetchstat(self):
+        os.symlink(os.path.join(self.root, 'sub1'), os.path.join(self.root, 'link'))
+        files = FnF.Filenames([os.path.join(self.root, f) for f in ['a.txt', 'sub1', 'link', 'missing']])
+        files.prefetchstat(workers=2)
+        with mock.patch('os.stat', side_effect=AssertionError('stat called')):
+            self.assertEqual([f.exists for f in files], [True, True, True, False])
+            self.assertEqual([f.isdir for f in files], [False, True, True, False])
+        self.assertEqual(files[0].stat.st_size, len('a.txt'))
+
+        files = FnF.listsubdir(self.root, full=True)
+        files.prefetchstat(lstat=True)
+        self.assertEqual(sorted(f.raw for f in files if f.isdir),
+                         [os.path.join(self.root, d, '') for d in ['.git', '_build', 'sub1', 'sub2']])
+
+    def test_listsubdirrec(self):
+        dirs = FnF.listsubdirrec(self.root)
+        expected = [os.path.join(self.root, d) for d in ['', 'sub1/', 'sub1/deep/', 'sub2/']]
+        self.assertEqual(sorted(dirs.getstrlist()), expected)
+
+        dirs = FnF.listsubdirrec(self.root, system=True)
+        self.assertIn(os.path.join(self.root, '.git', 'objects', ''), dirs.getstrlist())
+
+        dirs = FnF.listsubdirrec(self.root, inc=['sub1'], dinc=['deep'])
+        self.assertEqual(dirs.getstrlist(), [os.path.join(self.root, 'sub1', '')])
+
+    def test_listsubdirrec_prunes_excluded_folders(self):
+        with countingScandir() as opened:
+            FnF.listsubdirrec(self.root, dinc=['sub1'])
+
+        # only the root and sub2 are read, not .git, _build or anything below sub1
+        self.assertEqual(sorted(opened), [self.root, os.path.join(self.root, 'sub2')])
+
+    def test_listfilesext(self):
+        files = FnF.listfilesext(self.root)
+        self.assertEqual(sorted(files.getstrlist()), ['a.txt', 'b.JPG'])
+
+        files = FnF.listfilesext(self.root, ext=['.jpg'], rec=True)
+        expected = [os.path.join(self.root, f) for f in ['b.JPG', 'sub1/deep/d.jpg']]
+        self.assertEqual(sorted(files.getstrlist()), expected)
+
+        files = FnF.listfilesext(self.root, rec=True, full=False, system=True)
+        self.assertEqual(sorted(files.getstrlist()),
+                         ['.hidden', 'a.txt', 'b.JPG', 'c.txt', 'd.jpg', 'e.txt', 'f.txt'])
+
+        files = FnF.listfilesext(self.root, rec=True, columnar=True)
+        self.assertIsInstance(files, FnF.ColumnarFilenames)
+        self.assertEqual(files.getstrlist(), FnF.listfilesext(self.root, rec=True).getstrlist())
+
+    def test_listfilesext_reads_each_folder_once(self):
+        with countingScandir() as opened:
+            FnF.listfilesext(self.root, rec=True)
+
+        self.assertEqual(len(opened), len(set(opened)))
+        self.assertEqual(len(opened), 4)
+
+    def test_iter_functions_match_list_functions(self):
+        self.assertEqual(list(FnF.iterfiles(self.root)), FnF.listfiles(self.root).getstrlist())
+        self.assertEqual(list(FnF.itersubdir(self.root)), FnF.listsubdir(self.root).getstrlist())
+        self.assertEqual(list(FnF.itersubdirrec(self.root, system=True)),
+                         FnF.listsubdirrec(self.root, system=True).getstrlist())
+        self.assertEqual(list(FnF.iterfilesext(self.root, ext=['.txt'], rec=True)),
+                         FnF.listfilesext(self.root, ext=['.txt'], rec=True).getstrlist())
+
+    def test_iterfilesext_is_lazy(self):
+        with countingScandir() as opened:
+            files = FnF.iterfilesext(self.root, rec=True)
+            self.assertEqual(opened, [])
+            first = next(files)
+            self.assertEqual(opened, [self.root])
+
+        self.assertIsInstance(first, FnF.PathStr)
+
+    def test_listglob(self):
+        def glob(pattern, **kwargs):
+            return sorted(os.path.relpath(p, self.root) for p in FnF.listglob(pattern, self.root, **kwargs))
+
+        self.assertEqual(glob('**/*.txt'), ['_build/f.txt', 'a.txt', 'sub1/c.txt'])
+        self.assertEqual(glob('**/.git/**/*.txt'), ['.git/objects/e.txt'])
+        self.assertEqual(glob('*/[cd].*'), ['sub1/c.txt'])
+        self.assertEqual(glob('**/*.txt', system=False), ['a.txt', 'sub1/c.txt'])
+        self.assertEqual(glob('**/*', ext=['.jpg']), ['b.JPG', 'sub1/deep/d.jpg'])
+        self.assertEqual(glob('sub?/'), ['sub1', 'sub2'])
+        self.assertEqual(FnF.listglob(os.path.join(self.root, 'sub1', '*.txt')).getstrlist(),
+                         [os.path.join(self.root, 'sub1', 'c.txt')])
+
+    def test_listglob_reads_only_matching_folders(self):
+        with countingScandir() as opened:
+            files = FnF.listglob('sub1/deep/*.jpg', self.root)
+            self.assertEqual(opened, [os.path.join(self.root, 'sub1', 'deep')])
+            self.assertEqual(files.getstrlist(), [os.path.join(self.root, 'sub1', 'deep', 'd.jpg')])
+
+            del opened[:]
+            FnF.listglob('s*/deep/*', self.root)
+            self.assertEqual(opened, [self.root, os.path.join(self.root, 'sub1', 'deep')])
+
+    def test_sorted_walk(self):
+        makeTree(self.root, ['sub10/g.txt', 'sub1 b/h.txt', 'sub1/File2.txt', 'sub1/file10.txt', 'sub1/deep/a.txt'])
+        files = FnF.listfilesext(self.root, rec=True)
+        files.sort()
+        self.assertEqual(FnF.listfilesext(self.root, rec=True, sort='natural').getstrlist(), files.getstrlist())
+        self.assertEqual(FnF.listfilesext(self.root, rec=True, sort='human').getstrlist(),
+                         FnF.humansort(files.getstrlist()))
+        self.assertEqual(FnF.listfilesext(self.root, rec=True, full=False, sort='natural').getstrlist(),
+                         [os.path.basename(f) for f in files])
+        self.assertEqual(FnF.listfilesext(self.root, sort='natural').getstrlist(), ['a.txt', 'b.JPG'])
+        with self.assertRaises(TypeError):
+            FnF.listfilesext(self.root, sort='size')
+
+    def test_parallel_walk(self):
+        serial = FnF.listfilesext(self.root, rec=True, system=True).getstrlist()
+        parallel = FnF.listfilesext(self.root, rec=True, system=True, workers=4).getstrlist()
+        self.assertEqual(sorted(parallel), sorted(serial))
+
+        ordered = FnF.listfilesext(self.root, rec=True, system=True, workers=4, ordered=True)
+        self.assertEqual(ordered.getstrlist(), serial)
+
+        dirs = FnF.listsubdirrec(self.root, workers=3, ordered=True)
+        self.assertEqual(dirs.getstrlist(), FnF.listsubdirrec(self.root).getstrlist())
+
+    def test_async_listing(self):
+        async def collect(agen):
+            return [f async for f in agen]
+
+        def run(agen):
+            return asyncio.run(collect(agen))
+
+        files = run(FnF.aiterfilesext(self.root, rec=True, ext=['.txt'], workers=2))
+        self.assertTrue(all(isinstance(f, FnF.PathStr) for f in files))
+        self.assertEqual(sorted(files),
+                         sorted(FnF.listfilesext(self.root, rec=True, ext=['.txt']).getstrlist()))
+
+        files = run(FnF.aiterfilesext(self.root))
+        self.assertEqual(sorted(files), sorted(FnF.listfilesext(self.root).getstrlist()))
+
+        dirs = run(FnF.aitersubdirrec(self.root, system=True))
+        self.assertEqual(sorted(dirs), sorted(FnF.listsubdirrec(self.root, system=True).getstrlist()))
+
+    def test_dirindex(self):
+        # make every folder look old enough for its listing to be trusted
+        for folder, subfolders, files in os.walk(self.root):
+            os.utime(folder, (1e9, 1e9))
+
+        indexdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, indexdir)
+        indexfile = os.path.join(indexdir, 'tree.index')
+
+        expected = FnF.listfilesext(self.root, rec=True).getstrlist()
+        files = FnF.listfilesext(self.root, rec=True, index=indexfile)
+        self.assertEqual(files.getstrlist(), expected)
+        self.assertTrue(os.path.exists(indexfile))
+
+        # nothing has changed: no folder is read again
+        index = FnF.DirIndex(indexfile)
+        with mock.patch('os.scandir', side_effect=AssertionError('scandir called')):
+            files = FnF.listfilesext(self.root, rec=True, index=index)
+        self.assertEqual(files.getstrlist(), expected)
+        self.assertEqual((index.reads, index.hits), (0, 4))
+        self.assertTrue(all(f.exists for f in files))
+
+        # only the changed folder is read
+        makeTree(self.root, ['sub1/new.txt'])
+        shutil.rmtree(os.path.join(self.root, 'sub1', 'deep'))
+        index = FnF.DirIndex(indexfile)
+        files = FnF.listfilesext(self.root, rec=True, index=index)
+        self.assertEqual(files.getstrlist(), FnF.listfilesext(self.root, rec=True).getstrlist())
+        self.assertEqual(index.reads, 1)
+        self.assertEqual(len(index), 3)   # sub1/deep has been dropped
+        self.assertEqual(FnF.listsubdirrec(self.root, index=index).getstrlist(),
+                         FnF.listsubdirrec(self.root).getstrlist())
+
+    def test_snapshot_diff(self):
+        before = FnF.Snapshot.scan(self.root, rec=True)
+        self.assertEqual(sorted(before), sorted(FnF.listfilesext(self.root, rec=True).getstrlist()))
+
+        path = lambda p: os.path.join(self.root, p)
+        os.rename(path('a.txt'), path('sub2/a.txt'))
+        os.remove(path('sub1/c.txt'))
+        makeTree(self.root, ['sub2/new.txt'])
+        with open(path('b.JPG'), 'a') as f:
+            f.write('more')
+
+        changes = before.diff(FnF.Snapshot.scan(self.root, rec=True))
+        self.assertEqual(changes.added.getstrlist(), [path('sub2/new.txt')])
+        self.assertEqual(changes.removed.getstrlist(), [path('sub1/c.txt')])
+        self.assertEqual(changes.modified.getstrlist(), [path('b.JPG')])
+        self.assertEqual(changes.renamed, [(path('a.txt'), path('sub2/a.txt'))])
+
+        # a snapshot survives being saved and loaded
+        snapfile = os.path.join(self.root, 'sub2', 'snap')
+        before.save(snapfile)
+        self.assertEqual(FnF.Snapshot.load(snapfile)._files, before._files)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is Linux only')
+    def test_watcher_watch_errors(self):
+        import errno
+        with FnF.FilenamesWatcher(self.root) as watcher:
+            # a folder that has gone again is ignored
+            watcher._watch(os.path.join(self.root, 'gone'))
+            with mock.patch('ctypes.get_errno', return_value=errno.ENOSPC), \
+                    mock.patch.object(watcher, '_libc') as libc:
+                libc.inotify_add_watch.return_value = -1
+                with self.assertRaises(OSError) as cm:
+                    watcher._watch(os.path.join(self.root, 'sub1'))
+            self.assertEqual(cm.exception.errno, errno.ENOSPC)
+
+    def test_watcher(self):
+        seen = []
+        path = lambda p: os.path.join(self.root, p)
+        with FnF.FilenamesWatcher(self.root, rec=True, ext=['.txt'], callback=lambda e, f: seen.append((e, f))) as watcher:
+            self.assertEqual(sorted(watcher.files.getstrlist()),
+                             sorted(FnF.listfilesext(self.root, rec=True, ext=['.txt']).getstrlist()))
+
+            makeTree(self.root, ['new.txt', 'new.jpg', 'sub3/deeper/x.txt'])
+            os.remove(path('sub1/c.txt'))
+            with open(path('a.txt'), 'a') as f:
+                f.write('more')
+
+            changes = []
+            for i in range(10):
+                changes += watcher.poll(0.05)
+
+            self.assertEqual(seen, changes)
+            self.assertIn(('added', path('new.txt')), changes)
+            self.assertIn(('added', path('sub3/deeper/x.txt')), changes)
+            self.assertIn(('removed', path('sub1/c.txt')), changes)
+            self.assertIn(('modified', path('a.txt')), changes)
+            self.assertNotIn(path('new.jpg'), [f for e, f in changes])
+
+            shutil.rmtree(path('sub3'))
+            changes = []
+            for i in range(10):
+                changes += watcher.poll(0.05)
+            self.assertEqual(changes, [('removed', path('sub3/deeper/x.txt'))])
+
+            self.assertEqual(sorted(watcher.files.getstrlist()),
+                             sorted(FnF.listfilesext(self.root, rec=True, ext=['.txt']).getstrlist()))
+            self.assertEqual(watcher.rescan(), [])
+
+
 if __name__ == '__main__':
-	unittest.main()
\ No newline at end of file
+	unittest.main()